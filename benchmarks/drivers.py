@@ -0,0 +1,154 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+drivers.py
+
+Per call cost of the sensor driver reads and of one hal_gyroaccel
+handshake cycle, the SensorReader and Publisher the component runs,
+against the simulated bus: I2C transactions, bytes on the wire, bus time
+and wall/CPU time per call.
+
+Results are compared against a stored baseline. Any increase in
+transactions or bytes per call is a regression, times regress when they
+exceed the baseline by more than the tolerance. Exits with 1 on a
+regression. Record the baseline with --save, time baselines are only
+meaningful on the machine that recorded them.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from libraries.Gyrometer.L3GD20 import L3GD20
+from libraries.Accelerometer.Adafruit_LSM303DLHC import LSM303DLHC
+from libraries.GyroAccel.Conversion import AngleConversion
+from libraries.GyroAccel.Cycle import SensorReader, Publisher
+from libraries.GyroAccel.LoopStats import RollingHistogram
+from libraries.Bus.SharedBus import SharedBus
+from libraries.Bus.SimulatedBus import SimulatedBus, defaultDevices
+
+monotonic = getattr(time, 'monotonic', time.time)
+cpuTime = time.process_time if hasattr(time, 'process_time') else time.clock
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'drivers-baseline.json')
+COUNTS = ('transactions', 'bytes')
+TIMES = ('wall_us', 'cpu_us')
+
+
+def setup(speed):
+    """Drivers configured like hal_gyroaccel does, on a seeded simulated bus"""
+    simulated = SimulatedBus(defaultDevices(seed=1), speed=speed or None)
+    bus = SharedBus(simulated)
+    gyro = L3GD20(busId=1, slaveAddr=0x6B, ifLog=False, ifWriteBlock=False, bus=bus)
+    accel = LSM303DLHC(address_accel=0x19, address_mag=0x1E, debug=False, busId=1, bus=bus)
+    with gyro.Configure():
+        gyro.Set_PowerMode("Normal")
+        gyro.Set_FullScale_Value("250dps")
+        gyro.Set_AxisX_Enabled(True)
+        gyro.Set_AxisY_Enabled(False)
+        gyro.Set_AxisZ_Enabled(False)
+    accel.setTempEnabled(True)
+    gyro.Init()
+    gyro.minX, gyro.meanX, gyro.maxX = 0.4, 0.5, 0.6
+    return simulated, gyro, accel
+
+
+class Pin(object):
+    value = 0
+
+
+def benchmarks(gyro, accel):
+    conversion = AngleConversion('X', gyro.gain, accel.accelFactor)
+    conversion.setCalibration((gyro.minX, 0.0, 0.0), (gyro.meanX, 0.0, 0.0), (gyro.maxX, 0.0, 0.0))
+    pins = dict((name, Pin()) for name in ('angle', 'rate', 'dt', 'age', 'capture-time', 'req', 'ack', 'invert', 'offset'))
+    reader = SensorReader(gyro, accel, 'X', readTime=RollingHistogram(0.0, 0.05), pins=pins)
+    publisher = Publisher(conversion, pins)
+
+    def halCycle():
+        # what the handshake acquisition mode of hal_gyroaccel does on req
+        publisher.publish((monotonic(), reader.read()))
+
+    return [('Get_CalOutX_Value', gyro.Get_CalOutX_Value),
+            ('Get_RawOut_Value', gyro.Get_RawOut_Value),
+            ('readAccelerationsG', accel.readAccelerationsG),
+            ('readMagneticsGauss', accel.readMagneticsGauss),
+            ('hal_cycle', halCycle)]
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure(simulated, function, calls, repeat):
+    for i in range(10):
+        function()
+    rounds = []
+    for r in range(repeat):
+        transactions, count, busTime = simulated.transactions, simulated.bytes, simulated.busTime
+        wall, cpu = monotonic(), cpuTime()
+        for i in range(calls):
+            function()
+        wall, cpu = monotonic() - wall, cpuTime() - cpu
+        rounds.append({'transactions': float(simulated.transactions - transactions) / calls,
+                       'bytes': float(simulated.bytes - count) / calls,
+                       'bus_us': (simulated.busTime - busTime) * 1e6 / calls,
+                       'wall_us': wall * 1e6 / calls,
+                       'cpu_us': cpu * 1e6 / calls})
+    return dict((key, median([r[key] for r in rounds])) for key in rounds[0])
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for key in COUNTS:
+            if result[key] > baseline[name][key]:
+                found.append('%s: %s %.2f > %.2f' % (name, key, result[key], baseline[name][key]))
+        for key in TIMES:
+            if result[key] > baseline[name][key] * (1.0 + tolerance):
+                found.append('%s: %s %.1f > %.1f + %d%%' % (name, key, result[key], baseline[name][key], tolerance * 100))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sensor driver benchmark')
+    parser.add_argument('-n', '--calls', help='Calls per round', type=int, default=200)
+    parser.add_argument('-r', '--repeat', help='Rounds per benchmark, the median round is reported', type=int, default=5)
+    parser.add_argument('-k', '--speed', help='Simulated I2C clock in Hz, 0 skips the bus delays', type=int, default=400000)
+    parser.add_argument('-b', '--baseline', help='Baseline file', default=BASELINE)
+    parser.add_argument('-t', '--tolerance', help='Allowed relative increase of the times', type=float, default=0.25)
+    parser.add_argument('-s', '--save', help='Store the results as the new baseline', action='store_true')
+    args = parser.parse_args()
+
+    simulated, gyro, accel = setup(args.speed)
+    results = dict((name, measure(simulated, function, args.calls, args.repeat))
+                   for name, function in benchmarks(gyro, accel))
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get('speed') == args.speed:
+            baseline = stored['results']
+        else:
+            print('baseline recorded at %s Hz, only comparing transactions and bytes' % stored.get('speed'))
+            baseline = dict((name, dict(result, wall_us=float('inf'), cpu_us=float('inf')))
+                            for name, result in stored['results'].items())
+    found = regressions(results, baseline, args.tolerance)
+    print(json.dumps({'speed': args.speed, 'results': results, 'regressions': found}, indent=2, sort_keys=True, separators=(',', ': ')))
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({'speed': args.speed, 'results': results}, f, indent=2, sort_keys=True, separators=(',', ': '))
+            f.write('\n')
+    elif found:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+startup.py
+
+Start-up benchmark for the hal_gyroaccel sensor stack: the library imports
+of hal_gyroaccel in a fresh interpreter, then driver construction, configuration and calibration up
+to the point where hal_gyroaccel calls h.ready(). Runs against an in
+memory bus, so it measures the Python side only.
+
+Exits with 1 if the median start-up time exceeds the budget.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+t0 = time.time()
+%(imports)st1 = time.time()
+numpyOnImport = 'numpy' in sys.modules
+
+
+class MemoryBus(object):
+    def __init__(self):
+        self.registers = {}
+
+    def read_byte_data(self, addr, cmd):
+        if (addr, cmd) == (0x6B, 0x27):
+            return 0x0f  # gyro data always available
+        return self.registers.get((addr, cmd), 0)
+
+    def write_byte_data(self, addr, cmd, value):
+        self.registers[(addr, cmd)] = value
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        return [self.read_byte_data(addr, (cmd & 0x7f) + i) for i in range(length)]
+
+bus = SharedBus(MemoryBus())
+gyro = L3GD20(busId=1, slaveAddr=0x6B, ifLog=False, ifWriteBlock=False, bus=bus)
+accel = LSM303DLHC(address_accel=0x19, address_mag=0x1E, debug=False, busId=1, bus=bus)
+with gyro.Configure():
+    gyro.Set_PowerMode("Normal")
+    gyro.Set_FullScale_Value("250dps")
+    gyro.Set_AxisX_Enabled(True)
+    gyro.Set_AxisY_Enabled(False)
+    gyro.Set_AxisZ_Enabled(False)
+accel.setTempEnabled(True)
+gyro.Init()
+t2 = time.time()
+gyro.CalibrateX(%(samples)d)
+t3 = time.time()
+sys.stdout.write('RESULT ' + json.dumps([t1 - t0, t2 - t1, t3 - t2, numpyOnImport]) + '\n')
+'''
+
+
+def libraryImports():
+    """The library import lines of hal_gyroaccel, so the benchmark follows them"""
+    with open(os.path.join(ROOT, 'hal_gyroaccel')) as f:
+        return ''.join(line for line in f if line.startswith('from libraries.'))
+
+
+def runOnce(samples, imports):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    child = CHILD % {'samples': samples, 'imports': imports}
+    output = subprocess.check_output([sys.executable, '-c', child], cwd=ROOT, env=env)
+    for line in output.decode().splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError('no result from child interpreter')
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='hal_gyroaccel start-up benchmark')
+    parser.add_argument('-n', '--runs', help='Number of fresh interpreters', type=int, default=5)
+    parser.add_argument('-s', '--samples', help='Calibration samples', type=int, default=20)
+    parser.add_argument('-b', '--budget', help='Start-up budget in seconds (import to ready)', type=float, default=0.5)
+    args = parser.parse_args()
+
+    importLines = libraryImports()
+    results = [runOnce(args.samples, importLines) for i in range(args.runs)]
+    imports = median([r[0] for r in results])
+    init = median([r[1] for r in results])
+    calibration = median([r[2] for r in results])
+    total = imports + init + calibration
+    print(json.dumps({'import': imports, 'init': init, 'calibration': calibration, 'total': total,
+                      'numpy_on_import': any(r[3] for r in results), 'budget': args.budget}, indent=2, sort_keys=True))
+    if total > args.budget:
+        print('start-up over budget: %.3fs > %.3fs' % (total, args.budget))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -178,15 +178,20 @@ def setupGyro(thread='base_thread'):
     sigDt = hal.newsig('%s-dt' % name, hal.HAL_FLOAT)
     sigNewAngle = hal.newsig('%s-new-angle' % name, hal.HAL_FLOAT)
     sigNewRate = hal.newsig('%s-new-rate' % name, hal.HAL_FLOAT)
+    sigAge = hal.newsig('%s-age' % name, hal.HAL_FLOAT)
+    sigCaptureTime = hal.newsig('%s-capture-time' % name, hal.HAL_FLOAT)
 
     gyroaccel = hal.loadusr('./hal_gyroaccel', name='gyroaccel',
                             bus_id=1, interval=0.05,
+                            acquisition='thread',
                             wait_name='gyroaccel')
     gyroaccel.pin('req').link(sigReq)
     gyroaccel.pin('ack').link(sigAck)
     gyroaccel.pin('dt').link(sigDt)
     gyroaccel.pin('angle').link(sigNewAngle)
     gyroaccel.pin('rate').link(sigNewRate)
+    gyroaccel.pin('age').link(sigAge)
+    gyroaccel.pin('capture-time').link(sigCaptureTime)
     gyroaccel.pin('invert').set(True)  # invert the output since we mounted the gyro upside down
 
     kalman = rt.loadrt('kalman', 'names=kalman')
@@ -196,6 +201,13 @@ def setupGyro(thread='base_thread'):
     kalman.pin('dt').link(sigDt)
     kalman.pin('new-angle').link(sigNewAngle)
     kalman.pin('new-rate').link(sigNewRate)
+    kalman.pin('capture-time').link(sigCaptureTime)  # used with rt-dt
+
+    # storage, tuned offline with tune_kalman
+    for param in ('qAngle', 'qBias', 'rMeasure'):
+        sigParam = hal.newsig('%s-%s' % (name, param.lower()), hal.HAL_FLOAT)
+        kalman.pin(param).link(sigParam)
+        hal.Pin('storage.kalman.%s' % param.lower()).link(sigParam)
 
 
 def setupStorage():
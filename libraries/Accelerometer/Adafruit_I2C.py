@@ -1,6 +1,6 @@
 #!/usr/bin/python
 
-import smbus
+import struct
 
 # ===========================================================================
 # Adafruit_I2C Base Class
@@ -22,6 +22,7 @@ Adafruit's Raspberry-Pi Python Code Library
 """
 class Adafruit_I2C :
 
+  @staticmethod
   def getPiRevision():
     "Gets the version number of the Raspberry Pi board"
     # Courtesy quick2wire-python-api
@@ -34,14 +35,18 @@ class Adafruit_I2C :
     except:
       return 0
  
-  def __init__(self, address, bus=smbus.SMBus(1 if getPiRevision() > 1 else 0), debug=False):
+  def __init__(self, address, bus=None, debug=False):
     self.address = address
 	# By default, the correct I2C bus is auto-detected using /proc/cpuinfo
+    if bus is None:
+      import smbus
+      bus = smbus.SMBus(1 if Adafruit_I2C.getPiRevision() > 1 else 0)
     self.bus = bus
 	# Alternatively, you can hard-code the bus version below:
 	# self.bus = smbus.SMBus(0); # Force I2C0 (early 256MB Pi's)
     # self.bus = smbus.SMBus(1); # Force I2C1 (512MB Pi's)
     self.debug = debug
+    self.structs = {}
 
   def reverseByteOrder(self, data):
     "Reverses the byte order of an int (16-bit) or long (32-bit) value"
@@ -139,3 +144,41 @@ class Adafruit_I2C :
     except IOError, err:
       print "Error accessing 0x%02X: Check your I2C address" % self.address
       return -1
+
+  def readInto(self, reg, buffer, length=None, offset=0):
+    "Reads length bytes in one transaction into a preallocated bytearray, returns the byte count"
+    if length is None:
+      length = len(buffer) - offset
+    try:
+      data = self.bus.read_i2c_block_data(self.address, reg, length)
+      buffer[offset:offset + len(data)] = data
+      if (self.debug):
+        print "I2C: Device 0x%02X returned %d bytes from reg 0x%02X" % (self.address, len(data), reg)
+      return len(data)
+    except IOError, err:
+      print "Error accessing 0x%02X: Check your I2C address" % self.address
+      return -1
+
+  def readStruct(self, reg, fmt, buffer=None):
+    "Reads and decodes a struct format in one transaction, e.g. '<hhh'"
+    s = self.structs.get(fmt)
+    if s is None:
+      s = self.structs[fmt] = struct.Struct(fmt)
+    if buffer is not None:
+      if self.readInto(reg, buffer, s.size) < s.size:
+        return -1
+      return s.unpack_from(buffer)
+    try:
+      data = self.bus.read_i2c_block_data(self.address, reg, s.size)
+    except IOError, err:
+      print "Error accessing 0x%02X: Check your I2C address" % self.address
+      return -1
+    if (self.debug):
+      print "I2C: Device 0x%02X returned %d bytes from reg 0x%02X" % (self.address, len(data), reg)
+    if len(data) < s.size:
+      return -1
+    return s.unpack(bytes(bytearray(data)))
+
+  def readInt16LE(self, reg, count, buffer=None):
+    "Reads count little endian signed 16-bit values in one transaction"
+    return self.readStruct(reg, '<%dh' % count, buffer)
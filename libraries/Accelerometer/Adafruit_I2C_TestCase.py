@@ -0,0 +1,64 @@
+#!/usr/bin/python
+
+import unittest
+import struct
+from Adafruit_I2C import Adafruit_I2C
+
+
+class FakeSMBus(object):
+    """Byte array backed stand-in for smbus.SMBus"""
+
+    def __init__(self):
+        self.registers = [0] * 0x40
+        self.transactions = 0
+        self.blockLimit = 32
+
+    def read_byte_data(self, addr, register):
+        self.transactions += 1
+        return self.registers[register]
+
+    def read_i2c_block_data(self, addr, register, length):
+        self.transactions += 1
+        start = register & 0x7f
+        return self.registers[start:start + min(length, self.blockLimit)]
+
+
+class Adafruit_I2C_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = FakeSMBus()
+        self.i2c = Adafruit_I2C(0x19, bus=self.bus)
+
+    def test_readInt16LE(self):
+        self.bus.registers[0x28:0x2e] = list(bytearray(struct.pack('<hhh', 1, -2, -32768)))
+        self.assertEqual(self.i2c.readInt16LE(0x28 | 0x80, 3), (1, -2, -32768))
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_readStruct_CallerBuffer(self):
+        self.bus.registers[0x03:0x09] = list(bytearray(struct.pack('>hhh', 10, -20, 30)))
+        buffer = bytearray(6)
+        self.assertEqual(self.i2c.readStruct(0x03, '>hhh', buffer), (10, -20, 30))
+        self.assertEqual(buffer, bytearray(struct.pack('>hhh', 10, -20, 30)))
+
+    def test_readInto_Offset(self):
+        self.bus.registers[0x28:0x2a] = [0x34, 0x12]
+        buffer = bytearray(4)
+        self.assertEqual(self.i2c.readInto(0x28, buffer, 2, 2), 2)
+        self.assertEqual(buffer, bytearray([0, 0, 0x34, 0x12]))
+
+    def test_readStruct_ShortRead(self):
+        self.bus.registers[0x28:0x2e] = list(bytearray(struct.pack('<hhh', 1, 2, 3)))
+        self.assertEqual(self.i2c.readInt16LE(0x28 | 0x80, 3), (1, 2, 3))
+        self.bus.registers[0x28:0x2e] = [0] * 6
+        self.bus.blockLimit = 4
+        self.assertEqual(self.i2c.readInt16LE(0x28 | 0x80, 3), -1)
+        self.assertEqual(self.i2c.readStruct(0x28 | 0x80, '<hhh', bytearray(6)), -1)
+
+    def test_read16_ByteReads(self):
+        self.bus.registers[0x05:0x07] = [0xff, 0xfe]
+        self.assertEqual(self.i2c.readS16(0x05), -2)
+        self.assertEqual(self.i2c.readU16(0x05), 0xfffe)
+        self.assertEqual(self.bus.transactions, 4)
+
+if __name__ == '__main__':
+    unittest.main()
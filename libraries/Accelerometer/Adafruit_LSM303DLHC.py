@@ -1,13 +1,8 @@
 #!/usr/bin/python
 
-import sys
-import os
-import time
-import smbus
 import math
-from datetime import datetime, date
+import struct
 from Adafruit_I2C import Adafruit_I2C
-import unittest
 
 # ===========================================================================
 # LSM303DLHC Class
@@ -23,6 +18,9 @@ class LSM303DLHC :
   accelAxes = None
   accelHiRez = None
   accelScale = None
+  accelFifoEnabled = None
+  accelDataReadyInt1 = None
+  accelFifoMode = None
   magFacot = None
   tempEnabled = None
   magDataRate = None
@@ -93,9 +91,17 @@ class LSM303DLHC :
       return 0
 
   # Constructor
-  def __init__(self, address_accel=0x19, address_mag=0x1E, debug=False, busId=1):
-    self.i2c_accel = Adafruit_I2C(address_accel, smbus.SMBus(busId), debug)
-    self.i2c_mag = Adafruit_I2C(address_mag, smbus.SMBus(busId), debug)
+  def __init__(self, address_accel=0x19, address_mag=0x1E, debug=False, busId=1, bus=None, simulate=False):
+    if bus is None:
+      if simulate:
+        from libraries.Bus.SimulatedBus import SimulatedBus
+        bus = SimulatedBus()
+      else:
+        import smbus
+        bus = smbus.SMBus(busId)
+    self.i2c_accel = Adafruit_I2C(address_accel, bus, debug)
+    self.i2c_mag = Adafruit_I2C(address_mag, bus, debug)
+    self.fifoBuffer = bytearray(32 * 6)
 
     self.address_accel = address_accel
     self.address_mag = address_mag
@@ -112,6 +118,11 @@ class LSM303DLHC :
     self.accelScale = 0b00
     self.accelHiRez = 0b0
     self.accelFactor = 0.001
+    # fifo disabled, bypass mode
+    self.accelFifoEnabled = 0b0
+    self.accelFifoMode = 0b00
+    # no interrupts on INT1
+    self.accelDataReadyInt1 = 0b0
 
     # Enable the magnetometer
     # continuous conversion mode
@@ -126,29 +137,13 @@ class LSM303DLHC :
 
   def readAccelerations(self):
     "Reads the accelerometer data from the sensor"
-    xlo = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_OUT_X_L_A)
-    if (self.debug):
-      print "DBG: accel X lo: 0x%04X (%d)" % (xlo & 0xFFFF, xlo)
-    xhi = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_OUT_X_H_A)
-    if (self.debug):
-      print "DBG: accel X hi: 0x%04X (%d)" % (xhi & 0xFFFF, xhi)
-    ylo = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_OUT_Y_L_A)
-    if (self.debug):
-      print "DBG: accel Y lo: 0x%04X (%d)" % (ylo & 0xFFFF, ylo)
-    yhi = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_OUT_Y_H_A)
-    if (self.debug):
-      print "DBG: accel Y hi: 0x%04X (%d)" % (yhi & 0xFFFF, yhi)
-    zlo = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_OUT_Z_L_A)
-    if (self.debug):
-      print "DBG: accel Z lo: 0x%04X (%d)" % (zlo & 0xFFFF, zlo)
-    zhi = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_OUT_Z_H_A)
-    if (self.debug):
-      print "DBG: accel Z hi: 0x%04X (%d)" % (zhi & 0xFFFF, zhi)
+    # auto-increment from OUT_X_L_A, little endian, 12 bit left justified
+    data = self.__readBlock(self.i2c_accel, self.__LSM303DLHC_REGISTER_ACCEL_OUT_X_L_A | 0x80, '<hhh')
 
     accelData = Obj3D()
-    accelData.x = (((xhi << 8) + xlo) >> 4)
-    accelData.y = (((yhi << 8) + ylo) >> 4)
-    accelData.z = (((zhi << 8) + zlo) >> 4)
+    accelData.x = data[0] >> 4
+    accelData.y = data[1] >> 4
+    accelData.z = data[2] >> 4
 
     return accelData
 
@@ -157,9 +152,9 @@ class LSM303DLHC :
     accelData = self.readAccelerations()
 
     accelVal3D = Obj3D()
-    accelVal3D.x = self.__twos_comp(accelData.x, 12) * self.accelFactor
-    accelVal3D.y = self.__twos_comp(accelData.y, 12) * self.accelFactor
-    accelVal3D.z = self.__twos_comp(accelData.z, 12) * self.accelFactor
+    accelVal3D.x = accelData.x * self.accelFactor
+    accelVal3D.y = accelData.y * self.accelFactor
+    accelVal3D.z = accelData.z * self.accelFactor
     return accelVal3D
 
   def setAccelerometerDataRate(self, rate):
@@ -243,31 +238,95 @@ class LSM303DLHC :
       print "New CTRL_REG4_A(23h): 0x%02X (%d)" % (param & 0xFF, param)
     self.i2c_accel.write8(self.__LSM303DLHC_REGISTER_ACCEL_CTRL_REG4_A, param)
 
-  def readMagnetics(self):
-    "Reads the magmetometer data from the sensor"
-    xlo = self.i2c_mag.readU8(self.__LSM303DLHC_REGISTER_MAG_OUT_X_L_M)
-    if (self.debug):
-      print "DBG: mag X lo: 0x%04X (%d)" % (xlo & 0xFFFF, xlo)
-    xhi = self.i2c_mag.readU8(self.__LSM303DLHC_REGISTER_MAG_OUT_X_H_M)
-    if (self.debug):
-      print "DBG: mag X hi: 0x%04X (%d)" % (xhi & 0xFFFF, xhi)
-    ylo = self.i2c_mag.readU8(self.__LSM303DLHC_REGISTER_MAG_OUT_Y_L_M)
+  def setAccelerometerFifoMode(self, mode):
+    "Sets the accelerometer fifo mode, enables the fifo unless bypassed"
+    if mode == 'bypass':
+      self.accelFifoMode = 0b00
+    elif mode == 'fifo':
+      self.accelFifoMode = 0b01
+    elif mode == 'stream':
+      self.accelFifoMode = 0b10
+    elif mode == 'trigger':
+      self.accelFifoMode = 0b11
+    else:
+      print "setAccelerometerFifoMode can be 'bypass', 'fifo', 'stream' or 'trigger'"
+    self.accelFifoEnabled = 0b0 if self.accelFifoMode == 0b00 else 0b1
+    self.__setCtrlReg5A()
+    self.__setFifoCtrlRegA()
+
+  def setAccelerometerStreamMode(self, rate=400):
+    "Starts high resolution streaming into the fifo at the given data rate"
+    self.setAccelerometerDataRate(rate)
+    self.setAccelerometerHighResolution(True)
+    self.setAccelerometerFifoMode('stream')
+
+  def setAccelerometerDataReadyInterrupt(self, val):
+    "Signals accelerometer data-ready on INT1"
+    if val == False:
+      self.accelDataReadyInt1 = 0b0
+    elif val == True:
+      self.accelDataReadyInt1 = 0b1
+    else:
+      print "setAccelerometerDataReadyInterrupt takes boolean input only"
+    self.__setCtrlReg3A()
+
+  def __setCtrlReg3A(self):
+    param = self.accelDataReadyInt1 << 4
     if (self.debug):
-      print "DBG: mag Y lo: 0x%04X (%d)" % (ylo & 0xFFFF, ylo)
-    yhi = self.i2c_mag.readU8(self.__LSM303DLHC_REGISTER_MAG_OUT_Y_H_M)
+      print "New CTRL_REG3_A(22h): 0x%02X (%d)" % (param & 0xFF, param)
+    self.i2c_accel.write8(self.__LSM303DLHC_REGISTER_ACCEL_CTRL_REG3_A, param)
+
+  def __setCtrlReg5A(self):
+    param = self.accelFifoEnabled << 6
     if (self.debug):
-      print "DBG: mag Y hi: 0x%04X (%d)" % (yhi & 0xFFFF, yhi)
-    zlo = self.i2c_mag.readU8(self.__LSM303DLHC_REGISTER_MAG_OUT_Z_L_M)
+      print "New CTRL_REG5_A(24h): 0x%02X (%d)" % (param & 0xFF, param)
+    self.i2c_accel.write8(self.__LSM303DLHC_REGISTER_ACCEL_CTRL_REG5_A, param)
+
+  def __setFifoCtrlRegA(self):
+    param = self.accelFifoMode << 6
     if (self.debug):
-      print "DBG: mag Z lo: 0x%04X (%d)" % (zlo & 0xFFFF, zlo)
-    zhi = self.i2c_mag.readU8(self.__LSM303DLHC_REGISTER_MAG_OUT_Z_H_M)
+      print "New FIFO_CTRL_REG_A(2Eh): 0x%02X (%d)" % (param & 0xFF, param)
+    self.i2c_accel.write8(self.__LSM303DLHC_REGISTER_ACCEL_FIFO_CTRL_REG_A, param)
+
+  def readAccelerationsFifo(self):
+    "Drains the accelerometer fifo, returns an (n, 3) array of raw counts"
+    import numpy
+    src = self.i2c_accel.readU8(self.__LSM303DLHC_REGISTER_ACCEL_FIFO_SRC_REG_A)
+    if src == -1:
+      raise IOError("Error reading FIFO_SRC_REG_A from 0x%02X" % self.address_accel)
+    if src & 0x20:    # EMPTY
+      count = 0
+    elif src & 0x40:  # OVRN, all 32 levels are filled
+      count = 32
+    else:
+      count = src & 0x1F
     if (self.debug):
-      print "DBG: mag Z hi: 0x%04X (%d)" % (zhi & 0xFFFF, zhi)
+      print "DBG: accel fifo level: %d" % count
+    total = count
+    offset = 0
+    while count > 0:
+      # SMBus blocks are limited to 32 bytes, read at most 5 samples at once,
+      # the address rolls over from OUT_Z_H_A to OUT_X_L_A while the fifo is enabled
+      n = min(count, 5)
+      if self.i2c_accel.readInto(self.__LSM303DLHC_REGISTER_ACCEL_OUT_X_L_A | 0x80, self.fifoBuffer, 6 * n, offset) == -1:
+        raise IOError("Error reading accel fifo from 0x%02X" % self.address_accel)
+      offset += 6 * n
+      count -= n
+    return numpy.frombuffer(self.fifoBuffer, dtype='<i2', count=3 * total).reshape(-1, 3) >> 4
+
+  def readAccelerationsFifoG(self):
+    "Drains the accelerometer fifo, returns an (n, 3) array in G unit"
+    return self.readAccelerationsFifo() * self.accelFactor
+
+  def readMagnetics(self):
+    "Reads the magmetometer data from the sensor"
+    # the magnetometer auto-increments on its own, big endian in X, Z, Y order
+    data = self.__readBlock(self.i2c_mag, self.__LSM303DLHC_REGISTER_MAG_OUT_X_H_M, '>hhh')
 
     magData = Obj3D()
-    magData.x = (((xhi & 0x000F) << 8) + xlo)
-    magData.y = (((yhi & 0x000F) << 8) + ylo)
-    magData.z = (((zhi & 0x000F) << 8) + zlo)
+    magData.x = data[0]
+    magData.z = data[1]
+    magData.y = data[2]
 
     return magData
 
@@ -276,9 +335,9 @@ class LSM303DLHC :
     magData = self.readMagnetics()
 
     magVal3D = Obj3D()
-    magVal3D.x = self.__twos_comp(magData.x, 12) * self.magFactor
-    magVal3D.y = self.__twos_comp(magData.y, 12) * self.magFactor
-    magVal3D.z = self.__twos_comp(magData.z, 12) * self.magFactor
+    magVal3D.x = magData.x * self.magFactor
+    magVal3D.y = magData.y * self.magFactor
+    magVal3D.z = magData.z * self.magFactor
     return magVal3D
 
   def readMagneticHeading(self):
@@ -363,6 +422,15 @@ class LSM303DLHC :
     temp = self.readTemperature()
     return (self.__twos_comp(temp, 12) / 8.0) + 18
 
+  def __readBlock(self, i2c, reg, fmt):
+    "Reads and decodes a block of registers in one transaction"
+    data = i2c.readStruct(reg, fmt)
+    if data == -1:
+      raise IOError("Error reading block from 0x%02X reg 0x%02X" % (i2c.address, reg))
+    if (self.debug):
+      print "DBG: block from reg 0x%02X: %s" % (reg, data)
+    return data
+
   def __twos_comp(self, val, bits):
     "compute the 2's compliment of int value val"
     if( (val&(1<<(bits-1))) != 0 ):
@@ -375,50 +443,3 @@ class Obj3D :
 	x = None
 	y = None
 	z = None
-
-class LSM303DLHCLibraryTests(unittest.TestCase):
-	def setUp(self):
-		self.lsm = LSM303DLHC()
-		self.lsm.setTempEnabled(True)
-		pass
-
-	def tearDown(self):
-		self.lsm = None
-		pass
-
-	def test_reading_raw(self):
-		count = 0
-		print ""
-		while count < 3:
-			time.sleep(0.25)
-			accel = self.lsm.readAccelerations()
-			mag = self.lsm.readMagnetics()
-			temp = self.lsm.readTemperature()
-			print "Timestamp: %s" % datetime.now().isoformat() #strftime('%Y-%m-%dT%H:%M:%S(%Z)')
-			print "Accel X: 0x%04X (%d) Y: 0x%04X (%d) Z: 0x%04X (%d)" % (accel.x & 0xFFFF, accel.x, accel.y & 0xFFFF, accel.y, accel.z & 0xFFFF, accel.z)
-			print "Mag   X: 0x%04X (%d) Y: 0x%04X (%d) Z: 0x%04X (%d)" % (mag.x & 0xFFFF, mag.x, mag.y & 0xFFFF, mag.y, mag.z & 0xFFFF, mag.z)
-			print "Temp   : 0x%04X (%d)" % (temp & 0xFFFF, temp)
-			count = count + 1
-		pass
-
-	def test_reading_converted(self):
-		count = 0
-		print ""
-		while count < 3:
-			time.sleep(0.25)
-			accel = self.lsm.readAccelerationsG()
-			mag = self.lsm.readMagneticsGauss()
-			temp = self.lsm.readTemperatureCelsius()
-			heading = self.lsm.readMagneticHeading()
-			print "Timestamp: %s" % datetime.now().isoformat() #strftime('%Y-%m-%dT%H:%M:%S(%Z)')
-			print "Accel X: %6.3f G,     Y: %6.3f G,     Z: %6.3f G" % (accel.x, accel.y, accel.z)
-			print "Mag   X: %6.3f gauss, Y: %6.3f gauss, Z: %6.3f gauss" % (mag.x, mag.y, mag.z)
-			print "Temp:    %6.3f C" % (temp)
-			print "Heading: %6.3f" % (heading)
-			count = count + 1
-		pass
-
-if __name__ == '__main__':
-	#unittest.main()
-	suite = unittest.TestLoader().loadTestsFromTestCase(LSM303DLHCLibraryTests)
-	unittest.TextTestRunner(verbosity=2).run(suite)
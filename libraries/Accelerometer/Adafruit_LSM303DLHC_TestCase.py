@@ -0,0 +1,79 @@
+#!/usr/bin/python
+
+import unittest
+import struct
+from Adafruit_LSM303DLHC import LSM303DLHC
+
+
+class FakeSMBus(object):
+    """Register map backed stand-in for smbus.SMBus, per slave address"""
+
+    def __init__(self):
+        self.registers = {0x19: [0] * 0x40, 0x1e: [0] * 0x40}
+        self.transactions = 0
+        self.fifo = []
+
+    def read_byte_data(self, addr, register):
+        self.transactions += 1
+        return self.registers[addr][register]
+
+    def write_byte_data(self, addr, register, value):
+        self.transactions += 1
+        self.registers[addr][register] = value
+
+    def read_i2c_block_data(self, addr, register, length):
+        self.transactions += 1
+        start = register & 0x7f
+        if addr == 0x19 and start == 0x28 and self.fifo:
+            data = []
+            while len(data) < length:
+                data.extend(bytearray(struct.pack('<hhh', *self.fifo.pop(0))))
+            return data
+        # the magnetometer auto-increments without the sub-address MSB
+        return self.registers[addr][start:start + length]
+
+
+class Adafruit_LSM303DLHC_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = FakeSMBus()
+        self.lsm = LSM303DLHC(bus=self.bus)
+        self.bus.transactions = 0
+
+    def test_readAccelerationsG(self):
+        self.bus.registers[0x19][0x28:0x2e] = list(bytearray(struct.pack('<hhh', 100 << 4, -100 << 4, -2048 << 4)))
+        accel = self.lsm.readAccelerationsG()
+        self.assertAlmostEqual(accel.x, 0.1)
+        self.assertAlmostEqual(accel.y, -0.1)
+        self.assertAlmostEqual(accel.z, -2.048)
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_readMagnetics(self):
+        self.bus.registers[0x1e][0x03:0x09] = list(bytearray(struct.pack('>hhh', 10, -20, 30)))
+        mag = self.lsm.readMagnetics()
+        self.assertEqual((mag.x, mag.y, mag.z), (10, 30, -20))
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_setAccelerometerStreamMode(self):
+        self.lsm.setAccelerometerStreamMode(1344)
+        self.assertEqual(self.bus.registers[0x19][0x20], 0x97)
+        self.assertEqual(self.bus.registers[0x19][0x23], 0x08)
+        self.assertEqual(self.bus.registers[0x19][0x24], 0x40)
+        self.assertEqual(self.bus.registers[0x19][0x2e], 0x80)
+
+    def test_readAccelerationsFifoG(self):
+        self.bus.fifo = [(i << 4, -i << 4, 1000 << 4) for i in range(7)]
+        self.bus.registers[0x19][0x2f] = 7
+        accel = self.lsm.readAccelerationsFifoG()
+        self.assertEqual(accel.shape, (7, 3))
+        self.assertAlmostEqual(accel[6, 1], -0.006)
+        self.assertAlmostEqual(accel[0, 2], 1.0)
+        self.assertEqual(self.bus.transactions, 3)
+
+    def test_readAccelerationsFifo_Empty(self):
+        self.bus.registers[0x19][0x2f] = 0x20
+        self.assertEqual(self.lsm.readAccelerationsFifo().shape, (0, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
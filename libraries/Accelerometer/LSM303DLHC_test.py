@@ -12,19 +12,69 @@ import os
 import time
 from datetime import datetime, date
 from Adafruit_LSM303DLHC import LSM303DLHC
+import unittest
 
-lsm = LSM303DLHC(0x19, 0x1E, False)
-lsm.setTempEnabled(True)
-
-while(1):
-    time.sleep(0.25)
-    accel = lsm.readAccelerationsG()
-    mag = lsm.readMagneticsGauss()
-    temp = lsm.readTemperatureCelsius()
-    heading = lsm.readMagneticHeading()
-
-    print "Timestamp: %s" % datetime.now().isoformat() #strftime('%Y-%m-%dT%H:%M:%S(%Z)')
-    print "Accel X: %6.3f G,     Y: %6.3f G,     Z: %6.3f G" % (accel.x, accel.y, accel.z)
-    print "Mag   X: %6.3f gauss, Y: %6.3f gauss, Z: %6.3f gauss" % (mag.x, mag.y, mag.z)
-    print "Temp:    %6.3f C" % (temp)
-    print "Heading: %6.3f" % (heading)
\ No newline at end of file
+class LSM303DLHCLibraryTests(unittest.TestCase):
+    def setUp(self):
+        self.lsm = LSM303DLHC()
+        self.lsm.setTempEnabled(True)
+
+    def tearDown(self):
+        self.lsm = None
+
+    def test_reading_raw(self):
+        count = 0
+        print ""
+        while count < 3:
+            time.sleep(0.25)
+            accel = self.lsm.readAccelerations()
+            mag = self.lsm.readMagnetics()
+            temp = self.lsm.readTemperature()
+            print "Timestamp: %s" % datetime.now().isoformat() #strftime('%Y-%m-%dT%H:%M:%S(%Z)')
+            print "Accel X: 0x%04X (%d) Y: 0x%04X (%d) Z: 0x%04X (%d)" % (accel.x & 0xFFFF, accel.x, accel.y & 0xFFFF, accel.y, accel.z & 0xFFFF, accel.z)
+            print "Mag   X: 0x%04X (%d) Y: 0x%04X (%d) Z: 0x%04X (%d)" % (mag.x & 0xFFFF, mag.x, mag.y & 0xFFFF, mag.y, mag.z & 0xFFFF, mag.z)
+            print "Temp   : 0x%04X (%d)" % (temp & 0xFFFF, temp)
+            count = count + 1
+
+    def test_reading_converted(self):
+        count = 0
+        print ""
+        while count < 3:
+            time.sleep(0.25)
+            accel = self.lsm.readAccelerationsG()
+            mag = self.lsm.readMagneticsGauss()
+            temp = self.lsm.readTemperatureCelsius()
+            heading = self.lsm.readMagneticHeading()
+            print "Timestamp: %s" % datetime.now().isoformat() #strftime('%Y-%m-%dT%H:%M:%S(%Z)')
+            print "Accel X: %6.3f G,     Y: %6.3f G,     Z: %6.3f G" % (accel.x, accel.y, accel.z)
+            print "Mag   X: %6.3f gauss, Y: %6.3f gauss, Z: %6.3f gauss" % (mag.x, mag.y, mag.z)
+            print "Temp:    %6.3f C" % (temp)
+            print "Heading: %6.3f" % (heading)
+            count = count + 1
+
+
+def readLoop():
+    lsm = LSM303DLHC(0x19, 0x1E, False)
+    lsm.setTempEnabled(True)
+
+    while(1):
+        time.sleep(0.25)
+        accel = lsm.readAccelerationsG()
+        mag = lsm.readMagneticsGauss()
+        temp = lsm.readTemperatureCelsius()
+        heading = lsm.readMagneticHeading()
+
+        print "Timestamp: %s" % datetime.now().isoformat() #strftime('%Y-%m-%dT%H:%M:%S(%Z)')
+        print "Accel X: %6.3f G,     Y: %6.3f G,     Z: %6.3f G" % (accel.x, accel.y, accel.z)
+        print "Mag   X: %6.3f gauss, Y: %6.3f gauss, Z: %6.3f gauss" % (mag.x, mag.y, mag.z)
+        print "Temp:    %6.3f C" % (temp)
+        print "Heading: %6.3f" % (heading)
+
+
+if __name__ == '__main__':
+    # --unittest runs the hardware tests against the sensor instead of the read loop
+    if '--unittest' in sys.argv:
+        suite = unittest.TestLoader().loadTestsFromTestCase(LSM303DLHCLibraryTests)
+        unittest.TextTestRunner(verbosity=2).run(suite)
+    else:
+        readLoop()
@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+InstrumentedBus.py
+
+Opt-in I2C transaction statistics, counters and latency histograms per
+slave address, register and operation.
+"""
+
+import time
+
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+class OperationStats(object):
+    """Counters of one (address, register, operation).
+
+    histogram[i] counts transactions faster than 2**i microseconds, the
+    last bucket also holds everything slower.
+    """
+
+    BUCKETS = 16
+    __slots__ = ('count', 'errors', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * self.BUCKETS
+
+
+class InstrumentedBus(object):
+    """smbus.SMBus compatible wrapper recording every transaction.
+
+    Failed transactions are counted as errors and re-raised, so they are
+    recorded before Adafruit_I2C turns them into -1. Wrap the innermost
+    bus, e.g. SharedBus(InstrumentedBus(smbus.SMBus(1))), the SharedBus
+    lock then serializes the updates and lock waits are not counted as
+    latency. Not installing the wrapper costs nothing.
+    """
+
+    def __init__(self, bus, clock=monotonic):
+        self.bus = bus
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.stats = {}
+        self.transactions = 0
+        self.errors = 0
+        self.busyTime = 0.0
+        self.maxLatency = 0.0
+
+    def __transfer(self, operation, addr, register, *args):
+        start = self.clock()
+        try:
+            result = getattr(self.bus, operation)(addr, *args)
+        except IOError:
+            self.__record((addr, register, operation), self.clock() - start, True)
+            raise
+        self.__record((addr, register, operation), self.clock() - start, False)
+        return result
+
+    def __record(self, key, latency, failed):
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = OperationStats()
+        stats.count += 1
+        stats.total += latency
+        if latency > stats.max:
+            stats.max = latency
+        stats.histogram[min(int(latency * 1e6).bit_length(), OperationStats.BUCKETS - 1)] += 1
+        self.transactions += 1
+        self.busyTime += latency
+        if latency > self.maxLatency:
+            self.maxLatency = latency
+        if failed:
+            stats.errors += 1
+            self.errors += 1
+
+    @staticmethod
+    def __order(item):
+        address, register, operation = item[0]
+        return address, -1 if register is None else register, operation
+
+    def snapshot(self):
+        """Returns a copy of the statistics as plain dicts and lists, times in seconds"""
+        operations = []
+        for (address, register, operation), stats in sorted(self.stats.items(), key=self.__order):
+            operations.append({'address': address, 'register': register, 'operation': operation,
+                               'count': stats.count, 'errors': stats.errors,
+                               'mean': stats.total / stats.count, 'max': stats.max,
+                               'histogram': list(stats.histogram)})
+        return {'transactions': self.transactions, 'errors': self.errors,
+                'busy': self.busyTime, 'max': self.maxLatency, 'operations': operations}
+
+    def read_byte(self, addr):
+        return self.__transfer('read_byte', addr, None)
+
+    def write_byte(self, addr, value):
+        return self.__transfer('write_byte', addr, None, value)
+
+    def read_byte_data(self, addr, cmd):
+        return self.__transfer('read_byte_data', addr, cmd, cmd)
+
+    def write_byte_data(self, addr, cmd, value):
+        return self.__transfer('write_byte_data', addr, cmd, cmd, value)
+
+    def read_word_data(self, addr, cmd):
+        return self.__transfer('read_word_data', addr, cmd, cmd)
+
+    def write_word_data(self, addr, cmd, value):
+        return self.__transfer('write_word_data', addr, cmd, cmd, value)
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        return self.__transfer('read_i2c_block_data', addr, cmd, cmd, length)
+
+    def write_i2c_block_data(self, addr, cmd, vals):
+        return self.__transfer('write_i2c_block_data', addr, cmd, cmd, vals)
@@ -0,0 +1,65 @@
+#!/usr/bin/python
+
+import errno
+import unittest
+from InstrumentedBus import InstrumentedBus
+
+
+class FakeSMBus(object):
+
+    def __init__(self):
+        self.fail = False
+
+    def read_byte_data(self, addr, cmd):
+        if self.fail:
+            raise IOError(errno.EREMOTEIO, 'Remote I/O error')
+        return cmd
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        return [0] * length
+
+
+class FakeClock(object):
+    """Every call advances the time by step seconds"""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class InstrumentedBus_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.smbus = FakeSMBus()
+        self.bus = InstrumentedBus(self.smbus, clock=FakeClock(0.0001))
+
+    def test_Counts(self):
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x0f), 0x0f)
+        self.bus.read_byte_data(0x6b, 0x0f)
+        self.assertEqual(self.bus.read_i2c_block_data(0x19, 0xa8, 6), [0] * 6)
+        snapshot = self.bus.snapshot()
+        self.assertEqual(snapshot['transactions'], 3)
+        self.assertAlmostEqual(snapshot['busy'], 0.0003)
+        self.assertEqual([(o['address'], o['register'], o['operation'], o['count']) for o in snapshot['operations']],
+                         [(0x19, 0xa8, 'read_i2c_block_data', 1), (0x6b, 0x0f, 'read_byte_data', 2)])
+        self.assertEqual(snapshot['operations'][1]['histogram'][7], 2)  # 100us < 128us
+
+    def test_Errors(self):
+        self.smbus.fail = True
+        self.assertRaises(IOError, self.bus.read_byte_data, 0x6b, 0x0f)
+        snapshot = self.bus.snapshot()
+        self.assertEqual((snapshot['transactions'], snapshot['errors']), (1, 1))
+        self.assertEqual(snapshot['operations'][0]['errors'], 1)
+
+    def test_Reset(self):
+        self.bus.read_byte_data(0x6b, 0x0f)
+        self.bus.reset()
+        self.assertEqual(self.bus.snapshot(), {'transactions': 0, 'errors': 0, 'busy': 0.0, 'max': 0.0, 'operations': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
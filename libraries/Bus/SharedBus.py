@@ -0,0 +1,94 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+SharedBus.py
+
+One I2C bus handle per bus id, shared by all sensor drivers and threads
+of a process.
+"""
+
+import threading
+
+
+class SharedBus(object):
+    """smbus.SMBus compatible transport that serializes transactions.
+
+    smbus only issues the I2C_SLAVE ioctl when the slave address differs
+    from the previous transaction on the same handle, sharing one handle
+    keeps that cache warm across drivers. The L3GD20 and LSM303DLHC
+    drivers take it as their optional bus argument, with simulate=True
+    and no bus they talk to a SimulatedBus instead of /dev/i2c-busId.
+    Use 'with bus:' to make a sequence of transactions atomic.
+    """
+
+    __buses = {}
+    __busesLock = threading.Lock()
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.lock = threading.RLock()
+        self.address = None         # Slave address of the last transaction
+        self.transactions = 0
+        self.addressChanges = 0
+
+    @classmethod
+    def open(cls, busId):
+        """Returns the process wide SharedBus for busId"""
+        with cls.__busesLock:
+            if busId not in cls.__buses:
+                import smbus
+                cls.__buses[busId] = cls(smbus.SMBus(busId))
+            return cls.__buses[busId]
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+    def __select(self, addr):
+        self.transactions += 1
+        if addr != self.address:
+            self.address = addr
+            self.addressChanges += 1
+
+    def read_byte(self, addr):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.read_byte(addr)
+
+    def write_byte(self, addr, value):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.write_byte(addr, value)
+
+    def read_byte_data(self, addr, cmd):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.read_byte_data(addr, cmd)
+
+    def write_byte_data(self, addr, cmd, value):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.write_byte_data(addr, cmd, value)
+
+    def read_word_data(self, addr, cmd):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.read_word_data(addr, cmd)
+
+    def write_word_data(self, addr, cmd, value):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.write_word_data(addr, cmd, value)
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.read_i2c_block_data(addr, cmd, length)
+
+    def write_i2c_block_data(self, addr, cmd, vals):
+        with self.lock:
+            self.__select(addr)
+            return self.bus.write_i2c_block_data(addr, cmd, vals)
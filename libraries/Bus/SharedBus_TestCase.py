@@ -0,0 +1,89 @@
+#!/usr/bin/python
+
+import unittest
+import threading
+import time
+from SharedBus import SharedBus
+
+
+class RecordingSMBus(object):
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.overlap = False
+
+    def __transaction(self, name, addr):
+        self.active += 1
+        if self.active > 1:
+            self.overlap = True
+        time.sleep(0.0001)  # let other threads run while the transaction is active
+        self.calls.append((name, addr))
+        self.active -= 1
+
+    def read_byte_data(self, addr, cmd):
+        self.__transaction('read_byte_data', addr)
+        return cmd
+
+    def write_byte_data(self, addr, cmd, value):
+        self.__transaction('write_byte_data', addr)
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        self.__transaction('read_i2c_block_data', addr)
+        return [cmd] * length
+
+
+class SharedBus_TestCase(unittest.TestCase):
+
+    def test_Forwards(self):
+        bus = SharedBus(RecordingSMBus())
+        self.assertEqual(bus.read_byte_data(0x6b, 0x0f), 0x0f)
+        self.assertEqual(bus.read_i2c_block_data(0x19, 0xa8, 6), [0xa8] * 6)
+        bus.write_byte_data(0x19, 0x20, 0x57)
+        self.assertEqual(bus.bus.calls, [('read_byte_data', 0x6b), ('read_i2c_block_data', 0x19), ('write_byte_data', 0x19)])
+
+    def test_AddressTracking(self):
+        bus = SharedBus(RecordingSMBus())
+        for addr in [0x6b, 0x6b, 0x19, 0x19, 0x1e, 0x6b]:
+            bus.read_byte_data(addr, 0)
+        self.assertEqual(bus.transactions, 6)
+        self.assertEqual(bus.addressChanges, 4)
+        self.assertEqual(bus.address, 0x6b)
+
+    def test_Threads(self):
+        bus = SharedBus(RecordingSMBus())
+        go = threading.Event()
+
+        def worker(addr):
+            go.wait()
+            for i in range(200):
+                bus.read_i2c_block_data(addr, 0xa8, 6)
+        threads = [threading.Thread(target=worker, args=(addr,)) for addr in (0x6b, 0x19, 0x1e)]
+        for t in threads:
+            t.start()
+        go.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(bus.bus.calls), 600)
+        self.assertFalse(bus.bus.overlap)
+
+    def test_AtomicSequence(self):
+        bus = SharedBus(RecordingSMBus())
+        started = threading.Event()
+
+        def other():
+            started.set()
+            bus.read_byte_data(0x19, 0x20)
+        thread = threading.Thread(target=other)
+        with bus:
+            bus.read_byte_data(0x6b, 0x20)
+            thread.start()
+            started.wait()
+            thread.join(0.05)  # the other thread is blocked inside the sequence
+            bus.write_byte_data(0x6b, 0x20, 0x0f)
+        thread.join()
+        self.assertEqual(bus.bus.calls, [('read_byte_data', 0x6b), ('write_byte_data', 0x6b), ('read_byte_data', 0x19)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,420 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+SimulatedBus.py
+
+smbus.SMBus compatible stand-in with register level models of the
+L3GD20 gyroscope and the LSM303DLHC accelerometer and magnetometer, so
+the drivers and hal_gyroaccel can run and be benchmarked off the robot.
+"""
+
+import errno
+import math
+import os
+import random
+import time
+
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+def sineWave(amplitude=(1.0, 0.0, 0.0), frequency=1.0, phase=0.0):
+    """Returns a waveform, a function of time returning one value per axis"""
+    def waveform(t):
+        s = math.sin(2.0 * math.pi * frequency * t + phase)
+        return [a * s for a in amplitude]
+    return waveform
+
+
+class SensorSignal(object):
+    """Physical input of a sensor model: bias + waveform(t) + white noise.
+
+    Values are in the unit of the sensor, dps for the gyroscope, g for
+    the accelerometer and gauss for the magnetometer.
+    """
+
+    def __init__(self, bias=(0.0, 0.0, 0.0), noise=0.0, waveform=None, seed=None):
+        self.bias = bias
+        self.noise = noise
+        self.waveform = waveform
+        self.random = random.Random(seed)
+
+    def __call__(self, t):
+        values = list(self.bias)
+        if self.waveform is not None:
+            values = [v + w for v, w in zip(values, self.waveform(t))]
+        if self.noise:
+            values = [v + self.random.gauss(0.0, self.noise) for v in values]
+        return values
+
+
+def clamp(value, low, high):
+    return max(low, min(high, int(round(value))))
+
+
+class SampleClock(object):
+    """Sample instants of an output data rate, restarted when the rate changes"""
+
+    def __init__(self):
+        self.rate = 0
+        self.start = 0.0
+        self.count = 0
+
+    def advance(self, rate, now, limit):
+        """Returns the number of samples due since the last call and the
+        times of the last limit of them"""
+        if rate != self.rate:
+            self.rate = rate
+            self.start = now
+            self.count = 0
+        if not rate:
+            return 0, []
+        due = int((now - self.start) * rate)
+        new = due - self.count
+        self.count = due
+        return new, [self.start + float(i) / rate for i in range(max(self.count - limit, due - new) + 1, due + 1)]
+
+
+class RegisterModel(object):
+    """Register map of one I2C slave.
+
+    Multi byte transfers auto-increment the sub-address if the
+    autoIncrement bit is set in it, or always if autoIncrement is None.
+    """
+
+    autoIncrement = 0x80
+
+    def __init__(self):
+        self.registers = [0] * 0x80
+        self.pointer = 0
+
+    def update(self, now):
+        """Advances the model to time now"""
+        pass
+
+    def readRegister(self, register):
+        return self.registers[register]
+
+    def writeRegister(self, register, value):
+        self.registers[register] = value
+
+    def nextRegister(self, register):
+        return (register + 1) & 0x7f
+
+    def __start(self, register):
+        if self.autoIncrement is None:
+            return register & 0x7f, True
+        return register & ~self.autoIncrement & 0x7f, bool(register & self.autoIncrement)
+
+    def read(self, register, length, now):
+        self.update(now)
+        register, increment = self.__start(register)
+        data = []
+        for i in range(length):
+            data.append(self.readRegister(register))
+            if increment:
+                register = self.nextRegister(register)
+        self.pointer = register
+        return data
+
+    def write(self, register, values, now):
+        self.update(now)
+        register, increment = self.__start(register)
+        for value in values:
+            self.writeRegister(register, value & 0xff)
+            if increment:
+                register = self.nextRegister(register)
+        self.pointer = register
+        self.update(now)    # restart the sample clock if the data rate changed
+
+
+class SampledModel(RegisterModel):
+    """3 axis sensor sampling at its output data rate, with the ST
+    STATUS data available/overrun bits and a 32 level FIFO.
+
+    Outputs are little endian at OUT_X_L (0x28). While the FIFO is
+    enabled, reads from the output registers pop samples and the
+    sub-address rolls over from OUT_Z_H to OUT_X_L.
+    """
+
+    STATUS = 0x27
+    OUT = 0x28
+    FIFO_CTRL = 0x2e
+    FIFO_SRC = 0x2f
+    FIFO_DEPTH = 32
+
+    def __init__(self, signal):
+        RegisterModel.__init__(self)
+        self.signal = signal
+        self.clock = SampleClock()
+        self.fifo = []
+        self.overrun = False
+
+    def rate(self):
+        """Output data rate in Hz, 0 while powered down"""
+        return 0
+
+    def axes(self):
+        """Enabled axes bit mask, X is bit 0"""
+        return 0b111
+
+    def fifoMode(self):
+        """'bypass', 'fifo' or 'stream'"""
+        return 'bypass'
+
+    def toCounts(self, values):
+        return [0, 0, 0]
+
+    def update(self, now):
+        new, times = self.clock.advance(self.rate(), now, self.FIFO_DEPTH + 1)
+        if new <= 0:
+            return
+        axes = self.axes()
+        mode = self.fifoMode()
+        for t in times:
+            counts = self.toCounts(self.signal(t))
+            for axis in range(3):
+                if axes & (1 << axis):
+                    self.registers[self.OUT + 2 * axis] = counts[axis] & 0xff
+                    self.registers[self.OUT + 2 * axis + 1] = (counts[axis] >> 8) & 0xff
+            if mode == 'bypass' or (mode == 'fifo' and len(self.fifo) == self.FIFO_DEPTH):
+                continue
+            self.fifo.append(self.registers[self.OUT:self.OUT + 6])
+            if len(self.fifo) > self.FIFO_DEPTH:
+                self.fifo.pop(0)
+            self.overrun = len(self.fifo) == self.FIFO_DEPTH
+        status = self.registers[self.STATUS]
+        overrun = axes if new > 1 else status & axes
+        status |= axes | (overrun << 4)
+        if status & 0x07:
+            status |= 0x08
+        if status & 0x70:
+            status |= 0x80
+        self.registers[self.STATUS] = status
+
+    def readRegister(self, register):
+        if register == self.FIFO_SRC:
+            level = len(self.fifo)
+            value = level & 0x1f
+            if level == 0:
+                value |= 0x20
+            if self.overrun:
+                value |= 0x40
+            if level > self.registers[self.FIFO_CTRL] & 0x1f:
+                value |= 0x80
+            return value
+        if self.OUT <= register < self.OUT + 6:
+            if self.fifoMode() != 'bypass' and self.fifo:
+                value = self.fifo[0][register - self.OUT]
+                if register == self.OUT + 5:
+                    self.fifo.pop(0)
+                    self.overrun = False
+                return value
+            if (register - self.OUT) & 1:
+                # reading the high byte acknowledges the axis
+                axis = (register - self.OUT) // 2
+                status = self.registers[self.STATUS] & ~((0x01 | 0x10) << axis) & 0x77
+                if status & 0x07:
+                    status |= 0x08
+                if status & 0x70:
+                    status |= 0x80
+                self.registers[self.STATUS] = status
+        return self.registers[register]
+
+    def writeRegister(self, register, value):
+        RegisterModel.writeRegister(self, register, value)
+        if register == self.FIFO_CTRL and self.fifoMode() == 'bypass':
+            del self.fifo[:]
+            self.overrun = False
+
+    def nextRegister(self, register):
+        if register == self.OUT + 5 and self.fifoMode() != 'bypass':
+            return self.OUT
+        return RegisterModel.nextRegister(self, register)
+
+
+class L3GD20Model(SampledModel):
+    """L3GD20 gyroscope, powers up in power-down mode"""
+
+    RATES = (95, 190, 380, 760)
+    SENSITIVITY = (0.00875, 0.0175, 0.07, 0.07)    # dps per count
+    FIFO_MODES = ('bypass', 'fifo', 'stream', 'stream', 'stream')  # triggered modes just stream
+
+    def __init__(self, signal=None):
+        SampledModel.__init__(self, signal or SensorSignal())
+        self.registers[0x0f] = 0xd4     # WHO_AM_I
+        self.registers[0x20] = 0x07     # CTRL_REG1
+
+    def rate(self):
+        ctrl1 = self.registers[0x20]
+        return self.RATES[ctrl1 >> 6] if ctrl1 & 0x08 else 0
+
+    def axes(self):
+        return self.registers[0x20] & 0x07
+
+    def fifoMode(self):
+        if not self.registers[0x24] & 0x40:
+            return 'bypass'
+        mode = self.registers[self.FIFO_CTRL] >> 5
+        return self.FIFO_MODES[mode] if mode < len(self.FIFO_MODES) else 'bypass'
+
+    def toCounts(self, values):
+        sensitivity = self.SENSITIVITY[(self.registers[0x23] >> 4) & 0x03]
+        return [clamp(v / sensitivity, -32768, 32767) for v in values]
+
+
+class LSM303DLHCAccelModel(SampledModel):
+    """LSM303DLHC accelerometer, 12 bit left justified outputs"""
+
+    RATES = (0, 1, 10, 25, 50, 100, 200, 400, 1620, 1344)
+    RESOLUTION = (0.001, 0.002, 0.004, 0.012)     # g per count
+    FIFO_MODES = ('bypass', 'fifo', 'stream', 'stream')  # trigger mode just streams
+
+    def __init__(self, signal=None):
+        SampledModel.__init__(self, signal or SensorSignal())
+        self.registers[0x20] = 0x07     # CTRL_REG1_A
+
+    def rate(self):
+        ctrl1 = self.registers[0x20]
+        odr = ctrl1 >> 4
+        if odr == 9 and ctrl1 & 0x08:
+            return 5376
+        return self.RATES[odr] if odr < len(self.RATES) else 0
+
+    def axes(self):
+        return self.registers[0x20] & 0x07
+
+    def fifoMode(self):
+        if not self.registers[0x24] & 0x40:
+            return 'bypass'
+        return self.FIFO_MODES[self.registers[self.FIFO_CTRL] >> 6]
+
+    def toCounts(self, values):
+        resolution = self.RESOLUTION[(self.registers[0x23] >> 4) & 0x03]
+        return [clamp(v / resolution, -2048, 2047) << 4 for v in values]
+
+
+class LSM303DLHCMagModel(RegisterModel):
+    """LSM303DLHC magnetometer and temperature sensor, powers up sleeping.
+
+    Outputs are big endian in X, Z, Y order at 0x03, the sub-address
+    always auto-increments and rolls over from OUT_Y_L to OUT_X_H.
+    """
+
+    autoIncrement = None
+    RATES = (0.75, 1.5, 3.0, 7.5, 15.0, 30.0, 75.0, 220.0)
+    GAIN = (1100, 1100, 855, 670, 450, 400, 330, 230)   # counts per gauss
+    OUT = 0x03
+    SR = 0x09
+
+    def __init__(self, signal=None, temperature=25.0):
+        RegisterModel.__init__(self)
+        self.signal = signal or SensorSignal()
+        self.temperature = temperature
+        self.clock = SampleClock()
+        self.registers[0x01] = 0x20     # CRB_REG_M
+        self.registers[0x02] = 0x03     # MR_REG_M
+        self.registers[0x0a:0x0d] = [0x48, 0x34, 0x33]
+
+    def rate(self):
+        if self.registers[0x02] & 0x03:
+            return 0
+        return self.RATES[(self.registers[0x00] >> 2) & 0x07]
+
+    def update(self, now):
+        if self.registers[0x00] & 0x80:
+            raw = (clamp((self.temperature - 18) * 8, -2048, 2047) & 0xfff) << 4
+            self.registers[0x31:0x33] = [raw >> 8, raw & 0xff]
+        new, times = self.clock.advance(self.rate(), now, 1)
+        if new <= 0:
+            return
+        gain = self.GAIN[self.registers[0x01] >> 5]
+        x, y, z = [clamp(v * gain, -2048, 2047) & 0xffff for v in self.signal(times[-1])]
+        self.registers[self.OUT:self.OUT + 6] = [x >> 8, x & 0xff, z >> 8, z & 0xff, y >> 8, y & 0xff]
+        self.registers[self.SR] |= 0x01
+
+    def readRegister(self, register):
+        if register == self.OUT + 5:
+            self.registers[self.SR] &= ~0x01
+        return self.registers[register]
+
+    def nextRegister(self, register):
+        if register == self.OUT + 5:
+            return self.OUT
+        return RegisterModel.nextRegister(self, register)
+
+
+def defaultDevices(seed=None):
+    """A robot at rest: small gyro bias, gravity on Z and the earth field"""
+    return {0x6b: L3GD20Model(SensorSignal(bias=(0.5, -0.3, 0.2), noise=0.05, seed=seed)),
+            0x19: LSM303DLHCAccelModel(SensorSignal(bias=(0.0, 0.0, 1.0), noise=0.004, seed=seed)),
+            0x1e: LSM303DLHCMagModel(SensorSignal(bias=(0.25, 0.05, -0.4), noise=0.002, seed=seed))}
+
+
+class SimulatedBus(object):
+    """smbus.SMBus compatible bus with simulated slaves.
+
+    devices maps slave addresses to register models, transactions to other
+    addresses fail like a missing ACK. Each transaction blocks for the time
+    its start/stop conditions and 9 bit bytes take at speed Hz, e.g.
+    100000 or 400000, None skips the delays. clock is the time base of the
+    models.
+    """
+
+    def __init__(self, devices=None, speed=400000, clock=monotonic, sleep=time.sleep):
+        self.devices = defaultDevices() if devices is None else devices
+        self.speed = speed
+        self.clock = clock
+        self.sleep = sleep
+        self.transactions = 0
+        self.bytes = 0              # Including address and sub-address bytes
+        self.busTime = 0.0
+        self.__busyUntil = 0.0
+
+    def __transfer(self, addr, count, conditions):
+        self.transactions += 1
+        self.bytes += count
+        if self.speed:
+            duration = (9.0 * count + conditions) / self.speed
+            self.busTime += duration
+            now = self.clock()
+            self.__busyUntil = max(self.__busyUntil, now) + duration
+            if self.__busyUntil > now:
+                self.sleep(self.__busyUntil - now)
+        if addr not in self.devices:
+            raise IOError(errno.EREMOTEIO, os.strerror(errno.EREMOTEIO))
+        return self.devices[addr], self.clock()
+
+    def read_byte(self, addr):
+        device, now = self.__transfer(addr, 2, 2)
+        return device.read(device.pointer, 1, now)[0]
+
+    def write_byte(self, addr, value):
+        device, now = self.__transfer(addr, 2, 2)
+        device.update(now)
+        device.pointer = value
+
+    def read_byte_data(self, addr, cmd):
+        device, now = self.__transfer(addr, 4, 3)
+        return device.read(cmd, 1, now)[0]
+
+    def write_byte_data(self, addr, cmd, value):
+        device, now = self.__transfer(addr, 3, 2)
+        device.write(cmd, [value], now)
+
+    def read_word_data(self, addr, cmd):
+        device, now = self.__transfer(addr, 5, 3)
+        low, high = device.read(cmd, 2, now)
+        return low | (high << 8)
+
+    def write_word_data(self, addr, cmd, value):
+        device, now = self.__transfer(addr, 4, 2)
+        device.write(cmd, [value & 0xff, value >> 8], now)
+
+    def read_i2c_block_data(self, addr, cmd, length=32):
+        length = min(length, 32)    # I2C_SMBUS_BLOCK_MAX, like py-smbus
+        device, now = self.__transfer(addr, 3 + length, 3)
+        return device.read(cmd, length, now)
+
+    def write_i2c_block_data(self, addr, cmd, vals):
+        device, now = self.__transfer(addr, 2 + len(vals), 2)
+        device.write(cmd, vals, now)
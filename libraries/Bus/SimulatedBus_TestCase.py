@@ -0,0 +1,96 @@
+#!/usr/bin/python
+
+import unittest
+import struct
+from SimulatedBus import SimulatedBus, SensorSignal, L3GD20Model, LSM303DLHCAccelModel, LSM303DLHCMagModel
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class SimulatedBus_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.gyro = L3GD20Model(SensorSignal(bias=(1.0, -2.0, 0.5)))
+        self.accel = LSM303DLHCAccelModel(SensorSignal(bias=(0.1, 0.0, 1.0)))
+        self.mag = LSM303DLHCMagModel(SensorSignal(bias=(0.5, 0.25, -0.5)))
+        self.bus = SimulatedBus({0x6b: self.gyro, 0x19: self.accel, 0x1e: self.mag}, speed=None, clock=self.clock)
+
+    def readGyro(self):
+        return struct.unpack('<hhh', bytearray(self.bus.read_i2c_block_data(0x6b, 0x28 | 0x80, 6)))
+
+    def test_Gyro_PowerDown(self):
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x0f), 0xd4)
+        self.clock.now = 1.0
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x27), 0x00)
+
+    def test_Gyro_DataAvailable(self):
+        self.bus.write_byte_data(0x6b, 0x20, 0x0f)  # 95Hz, normal mode, XYZ
+        self.clock.now = 1.5 / 95
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x27), 0x0f)
+        self.assertEqual(self.readGyro(), (114, -229, 57))
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x27), 0x00)
+        self.clock.now = 3.5 / 95
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x27), 0xff)
+
+    def test_Gyro_NoAutoIncrement(self):
+        self.bus.write_byte_data(0x6b, 0x20, 0x0f)
+        self.clock.now = 1.5 / 95
+        self.assertEqual(self.bus.read_i2c_block_data(0x6b, 0x28, 3), [114] * 3)
+
+    def test_Gyro_FifoStream(self):
+        self.bus.write_byte_data(0x6b, 0x24, 0x40)
+        self.bus.write_byte_data(0x6b, 0x2e, 0x40)
+        self.bus.write_byte_data(0x6b, 0x20, 0x0f)
+        self.clock.now = 12.5 / 95
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x2f), 12 | 0x80)
+        data = self.bus.read_i2c_block_data(0x6b, 0x28 | 0x80, 30)
+        self.assertEqual(struct.unpack('<15h', bytearray(data))[-3:], (114, -229, 57))
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x2f), 7 | 0x80)
+        self.clock.now = 100.0
+        self.assertEqual(self.bus.read_byte_data(0x6b, 0x2f), 0x40 | 0x80)
+
+    def test_Accel_Counts(self):
+        self.bus.write_byte_data(0x19, 0x20, 0x57)  # 100Hz, XYZ
+        self.bus.write_byte_data(0x19, 0x23, 0x10)  # +-4g
+        self.clock.now = 0.015
+        data = struct.unpack('<hhh', bytearray(self.bus.read_i2c_block_data(0x19, 0x28 | 0x80, 6)))
+        self.assertEqual([v >> 4 for v in data], [50, 0, 500])
+
+    def test_Mag_Counts(self):
+        self.bus.write_byte_data(0x1e, 0x00, 0x90)  # temperature on, 15Hz
+        self.bus.write_byte_data(0x1e, 0x01, 0x40)  # +-1.9 gauss
+        self.bus.write_byte_data(0x1e, 0x02, 0x00)
+        self.clock.now = 0.1
+        self.assertEqual(self.bus.read_byte_data(0x1e, 0x09) & 0x01, 1)
+        data = struct.unpack('>hhh', bytearray(self.bus.read_i2c_block_data(0x1e, 0x03, 6)))
+        self.assertEqual(data, (428, -428, 214))
+        self.assertEqual(self.bus.read_byte_data(0x1e, 0x09) & 0x01, 0)
+        self.assertEqual(self.bus.read_i2c_block_data(0x1e, 0x31, 2), [0x03, 0x80])
+
+    def test_MissingSlave(self):
+        self.assertRaises(IOError, self.bus.read_byte_data, 0x42, 0x00)
+
+    def test_BusTime(self):
+        bus = SimulatedBus({0x19: self.accel}, speed=100000, clock=self.clock, sleep=self.clock.sleep)
+        bus.read_i2c_block_data(0x19, 0x28 | 0x80, 6)
+        bus.write_byte_data(0x19, 0x20, 0x57)
+        self.assertEqual((bus.transactions, bus.bytes), (2, 12))
+        self.assertAlmostEqual(bus.busTime, (9 * 9 + 3 + 9 * 3 + 2) / 100000.0)
+        self.assertAlmostEqual(sum(self.clock.slept), bus.busTime)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Acquisition.py
+
+Background sampling of the gyro/accel sensors for hal_gyroaccel.
+"""
+
+import os
+import threading
+import time
+
+
+def clockMonotonic():
+    """CLOCK_MONOTONIC in seconds through clock_gettime for Python 2 on
+    Linux, None where it is not available"""
+    import ctypes
+    import ctypes.util
+
+    class timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    try:
+        clock_gettime = ctypes.CDLL(ctypes.util.find_library('rt') or 'librt.so.1', use_errno=True).clock_gettime
+    except (OSError, AttributeError):
+        return None
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(timespec)]
+
+    def monotonic():
+        now = timespec()  # per call, ctypes releases the GIL
+        if clock_gettime(1, ctypes.byref(now)) != 0:  # CLOCK_MONOTONIC
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return now.tv_sec + now.tv_nsec * 1e-9
+    return monotonic
+
+
+# The clock rtapi_get_time() counts on the posix and rt-preempt flavors, so
+# timestamps can be compared with the realtime side. time.time as last resort.
+monotonic = getattr(time, 'monotonic', None) or clockMonotonic() or time.time
+
+
+class SampleRing(object):
+    """Fixed size ring of the most recent samples.
+
+    Lock-free for a single producer: a slot is filled before the index is
+    published, and rebinding the index is atomic under the GIL.
+    """
+
+    def __init__(self, size=8):
+        self.__samples = [None] * size
+        self.__size = size
+        self.__index = -1
+        self.count = 0
+
+    def push(self, sample):
+        index = (self.__index + 1) % self.__size
+        self.__samples[index] = sample
+        self.__index = index
+        self.count += 1
+
+    def latest(self):
+        """Returns the newest sample or None if nothing was pushed yet"""
+        index = self.__index
+        if index < 0:
+            return None
+        return self.__samples[index]
+
+    def recent(self, n):
+        """Returns up to n newest samples, oldest first"""
+        index = self.__index
+        n = min(n, self.count, self.__size)
+        return [self.__samples[(index - i) % self.__size] for i in range(n - 1, -1, -1)]
+
+
+class AcquisitionThread(threading.Thread):
+    """Calls read() every interval seconds and pushes
+    (timestamp, value) into the ring.
+
+    With a waiter (see DataReady) the thread reads as soon as the waiter
+    reports new data, interval then only bounds the wait.
+    """
+
+    def __init__(self, read, interval, ring, waiter=None):
+        super(AcquisitionThread, self).__init__()
+        self.daemon = True
+        self.read = read
+        self.interval = interval
+        self.ring = ring
+        self.waiter = waiter
+        self.error = None
+        self.__stop = threading.Event()
+
+    def run(self):
+        try:
+            while not self.__stop.is_set():
+                value = self.read()
+                self.ring.push((monotonic(), value))
+                if self.waiter is None:
+                    time.sleep(self.interval)
+                else:
+                    self.waiter.wait(self.interval)
+        except Exception as e:
+            self.error = e
+
+    def stop(self):
+        self.__stop.set()
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+
+import unittest
+import time
+from Acquisition import SampleRing, AcquisitionThread, clockMonotonic, monotonic
+
+
+class Acquisition_TestCase(unittest.TestCase):
+
+    def test_Monotonic(self):
+        clock = clockMonotonic()
+        if clock is None:
+            self.skipTest('no clock_gettime')
+        self.assertNotEqual(monotonic, time.time)
+        first = clock()
+        time.sleep(0.01)
+        self.assertGreaterEqual(clock() - first, 0.01)
+        self.assertLess(abs(clock() - monotonic()), 0.01)
+
+    def test_SampleRing_Empty(self):
+        ring = SampleRing(4)
+        self.assertEqual(ring.latest(), None)
+        self.assertEqual(ring.recent(3), [])
+
+    def test_SampleRing_Wraps(self):
+        ring = SampleRing(4)
+        for i in range(10):
+            ring.push(i)
+        self.assertEqual(ring.latest(), 9)
+        self.assertEqual(ring.recent(3), [7, 8, 9])
+        self.assertEqual(ring.recent(10), [6, 7, 8, 9])
+
+    def test_AcquisitionThread(self):
+        ring = SampleRing(4)
+        values = iter(range(1000))
+        thread = AcquisitionThread(lambda: next(values), 0.001, ring)
+        thread.start()
+        while ring.count < 3:
+            time.sleep(0.001)
+        thread.stop()
+        thread.join()
+        timestamps = [t for t, v in ring.recent(3)]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(thread.error, None)
+
+    def test_AcquisitionThread_Error(self):
+        def read():
+            raise IOError('bus error')
+        thread = AcquisitionThread(read, 0.001, SampleRing(4))
+        thread.start()
+        thread.join(1.0)
+        self.assertTrue(isinstance(thread.error, IOError))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+CalibrationCache.py
+
+On-disk cache of the gyro/accel calibration, so hal_gyroaccel can start
+without a stationary calibration pass.
+"""
+
+import math
+import os
+import sys
+import time
+if sys.version_info >= (3, 0):
+    import configparser
+else:
+    import ConfigParser as configparser
+
+
+class CalibrationCache(object):
+    """Calibration values stored in an ini file, one section per
+    sensor address, full scale setting and temperature band.
+
+    Entries older than maxAge seconds are treated as missing.
+    """
+
+    def __init__(self, path, maxAge=7 * 24 * 3600, bandWidth=5.0):
+        self.path = path
+        self.maxAge = maxAge
+        self.bandWidth = bandWidth
+
+    def section(self, address, fullScale, temperature):
+        band = int(math.floor(temperature / self.bandWidth))
+        return '0x%02x-%s-%d' % (address, fullScale, band)
+
+    def __read(self):
+        config = configparser.RawConfigParser()
+        config.optionxform = str  # keep the camelCase keys
+        config.read(self.path)
+        return config
+
+    def load(self, address, fullScale, temperature, now=None):
+        """Returns a dict of the cached values, None if missing or stale"""
+        config = self.__read()
+        section = self.section(address, fullScale, temperature)
+        if not config.has_section(section):
+            return None
+        values = dict((key, float(value)) for key, value in config.items(section))
+        if now is None:
+            now = time.time()
+        if now - values.pop('timestamp', 0.0) > self.maxAge:
+            return None
+        return values
+
+    def entries(self):
+        """Returns {section: values} of all entries including stale ones,
+        values keep their timestamp, for offline tools"""
+        config = self.__read()
+        return dict((section, dict((key, float(value)) for key, value in config.items(section)))
+                    for section in config.sections())
+
+    def store(self, address, fullScale, temperature, values, now=None):
+        config = self.__read()
+        section = self.section(address, fullScale, temperature)
+        if not config.has_section(section):
+            config.add_section(section)
+        for key, value in values.items():
+            config.set(section, key, repr(float(value)))
+        config.set(section, 'timestamp', repr(time.time() if now is None else now))
+        with open(self.path + '.tmp', 'w') as f:
+            config.write(f)
+        os.rename(self.path + '.tmp', self.path)  # never leave a truncated cache behind
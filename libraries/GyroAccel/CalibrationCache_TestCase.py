@@ -0,0 +1,47 @@
+#!/usr/bin/python
+
+import unittest
+import os
+import shutil
+import tempfile
+from CalibrationCache import CalibrationCache
+
+
+class CalibrationCache_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = CalibrationCache(os.path.join(self.dir, 'calibration.ini'), maxAge=100.0, bandWidth=5.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_Missing(self):
+        self.assertEqual(self.cache.load(0x6b, '250dps', 21.0), None)
+
+    def test_StoreLoad(self):
+        values = {'minX': -0.5, 'meanX': 0.125, 'maxX': 0.75}
+        self.cache.store(0x6b, '250dps', 21.0, values, now=1000.0)
+        self.assertEqual(self.cache.load(0x6b, '250dps', 24.9, now=1050.0), values)
+
+    def test_Keys(self):
+        self.cache.store(0x6b, '250dps', 21.0, {'meanX': 1.0}, now=1000.0)
+        self.assertEqual(self.cache.load(0x6b, '250dps', 26.0, now=1000.0), None)
+        self.assertEqual(self.cache.load(0x6b, '500dps', 21.0, now=1000.0), None)
+        self.assertEqual(self.cache.load(0x6a, '250dps', 21.0, now=1000.0), None)
+        self.cache.store(0x6b, '250dps', -3.0, {'meanX': 2.0}, now=1000.0)
+        self.assertEqual(self.cache.load(0x6b, '250dps', 21.0, now=1000.0), {'meanX': 1.0})
+
+    def test_Stale(self):
+        self.cache.store(0x6b, '250dps', 21.0, {'meanX': 1.0}, now=1000.0)
+        self.assertEqual(self.cache.load(0x6b, '250dps', 21.0, now=1101.0), None)
+
+    def test_Entries(self):
+        self.cache.store(0x6b, '250dps', 21.0, {'meanX': 1.0}, now=1000.0)
+        self.cache.store(0x6b, '250dps', -3.0, {'meanX': 2.0}, now=2000.0)
+        self.assertEqual(self.cache.entries(), {'0x6b-250dps-4': {'meanX': 1.0, 'timestamp': 1000.0},
+                                                '0x6b-250dps--1': {'meanX': 2.0, 'timestamp': 2000.0}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Conversion.py
+
+Raw sensor counts to physical units and angles for hal_gyroaccel.
+"""
+# numpy is imported where it is needed, like in the drivers
+
+import math
+
+
+class AngleConversion(object):
+    """Converts raw counts to the rate and angle of the angle output mode.
+
+    counts are gyro XYZ and accel XYZ. The rate is the calibrated rate of
+    axis like L3GD20.Get_CalOut*_Value, the angle is atan2(x, z) of the
+    acceleration like the pitch of SixDofConversion, in degrees.
+    """
+
+    def __init__(self, axis, gyroGain, accelFactor, accelZero=(0.0, 0.0, 0.0)):
+        self.index = 'XYZ'.index(axis)
+        self.gyroGain = gyroGain
+        self.accelFactor = accelFactor
+        self.accelXzero = accelZero[0]
+        self.accelZzero = accelZero[2]
+        self.setCalibration((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+
+    def setCalibration(self, low, mean, high):
+        """Gyro deadband and mean per axis in dps, e.g. from L3GD20.Calibrate()"""
+        self.low = low[self.index]
+        self.mean = mean[self.index]
+        self.high = high[self.index]
+
+    def convert(self, counts, invert=False, offset=0.0):
+        """Returns (rate, angle), the angle negated with invert and offset added"""
+        rate = counts[self.index] * self.gyroGain
+        if (rate >= self.low) and (rate <= self.high):
+            rate = 0
+        else:
+            rate -= self.mean
+        x = counts[3] * self.accelFactor - self.accelXzero
+        z = counts[5] * self.accelFactor - self.accelZzero
+        if invert:
+            angle = math.degrees(math.atan2(-x, -z))
+        else:
+            angle = math.degrees(math.atan2(x, z))
+        return rate, angle + offset
+
+
+class SixDofConversion(object):
+    """Converts the raw counts of one gyro, accel and optionally
+    magnetometer burst in a single vectorized step.
+
+    counts are gyro XYZ, accel XYZ and, with a magFactor, mag XYZ. Gyro
+    rates inside the calibration deadband [low, high] are 0, others have
+    the mean removed (see L3GD20.Get_CalOut_Value). The angles are pitch
+    atan2(x, z) and roll atan2(y, z) of the acceleration, negated with
+    invert for an upside down sensor, and the heading atan2(x, z) of the
+    magnetic field like LSM303DLHC.readMagneticHeading, in degrees.
+    """
+
+    def __init__(self, gyroGain, accelFactor, magFactor=None, accelZero=(0.0, 0.0, 0.0)):
+        import numpy
+        scale = [gyroGain] * 3 + [accelFactor] * 3
+        if magFactor is not None:
+            scale += [magFactor] * 3
+        self.scale = numpy.array(scale)
+        self.offset = numpy.zeros(len(scale))
+        self.offset[3:6] = accelZero
+        self.numerators = [3, 4, 6][:len(scale) // 3]
+        self.denominators = [5, 5, 8][:len(scale) // 3]
+        self.setCalibration((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+
+    def setCalibration(self, low, mean, high):
+        """Gyro deadband and mean per axis in dps, e.g. from L3GD20.Calibrate()"""
+        import numpy
+        self.low = numpy.array(low, dtype=float)
+        self.mean = numpy.array(mean, dtype=float)
+        self.high = numpy.array(high, dtype=float)
+
+    def convert(self, counts, invert=False, offset=0.0):
+        """Returns (values, angles), values in dps, g and gauss in counts order
+        and the angles pitch (plus offset), roll and with a magnetometer heading"""
+        import numpy
+        values = numpy.asarray(counts, dtype=float) * self.scale - self.offset
+        rates = values[:3]
+        values[:3] = numpy.where((rates >= self.low) & (rates <= self.high), 0.0, rates - self.mean)
+        sign = numpy.ones(len(self.numerators))
+        if invert:
+            sign[:2] = -1.0
+        angles = numpy.degrees(numpy.arctan2(values[self.numerators] * sign, values[self.denominators] * sign))
+        angles[0] += offset
+        return values, angles
@@ -0,0 +1,47 @@
+#!/usr/bin/python
+
+import unittest
+import math
+from Conversion import AngleConversion, SixDofConversion
+
+
+class Conversion_TestCase(unittest.TestCase):
+
+    def test_Units(self):
+        conversion = SixDofConversion(0.5, 0.001, 1 / 1000.0)
+        values, angles = conversion.convert([2, -4, 6, 1000, 0, 0, 500, 0, -500])
+        self.assertEqual(values.tolist(), [1.0, -2.0, 3.0, 1.0, 0.0, 0.0, 0.5, 0.0, -0.5])
+        self.assertEqual(len(angles), 3)
+        self.assertAlmostEqual(angles[2], 135.0)
+
+    def test_Deadband(self):
+        conversion = SixDofConversion(1.0, 0.001)
+        conversion.setCalibration((-1.0, 0.0, 4.0), (0.0, 1.0, 5.0), (1.0, 2.0, 6.0))
+        values, angles = conversion.convert([1, 10, 5, 0, 0, 1000])
+        self.assertEqual(values[:3].tolist(), [0.0, 9.0, 0.0])
+
+    def test_Angles_MatchScalar(self):
+        conversion = SixDofConversion(1.0, 0.001, accelZero=(0.1, 0.0, -0.05))
+        counts = [0, 0, 0, 300, -200, 900]
+        for invert in (False, True):
+            values, angles = conversion.convert(counts, invert)
+            sign = -1 if invert else 1
+            self.assertAlmostEqual(angles[0], math.degrees(math.atan2(sign * (0.3 - 0.1), sign * (0.9 + 0.05))))
+            self.assertAlmostEqual(angles[1], math.degrees(math.atan2(sign * -0.2, sign * (0.9 + 0.05))))
+
+    def test_AngleConversion_MatchesSixDof(self):
+        sixDof = SixDofConversion(0.5, 0.001, accelZero=(0.1, 0.0, -0.05))
+        angle = AngleConversion('Y', 0.5, 0.001, accelZero=(0.1, 0.0, -0.05))
+        calibration = (-1.0, 0.0, 4.0), (0.0, 1.0, 5.0), (1.0, 2.0, 6.0)
+        sixDof.setCalibration(*calibration)
+        angle.setCalibration(*calibration)
+        for counts in ([0, 20, 0, 300, -200, 900], [0, 3, 0, -40, 0, -1000]):
+            for invert in (False, True):
+                values, angles = sixDof.convert(counts, invert, 2.0)
+                rate, pitch = angle.convert(counts, invert, 2.0)
+                self.assertAlmostEqual(rate, values[1])
+                self.assertAlmostEqual(pitch, angles[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
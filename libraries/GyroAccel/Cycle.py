@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Cycle.py
+
+The per sample work of hal_gyroaccel: reading the sensors and publishing
+the converted sample on the HAL pins. Kept out of the component so it
+can be tested and benchmarked without a HAL.
+"""
+# numpy is imported where it is needed, like in the drivers
+
+import threading
+
+from Acquisition import monotonic
+
+
+class SensorReader(object):
+    """Reads one sample of raw counts, gyro XYZ, accel XYZ and with the
+    magnetometer mag XYZ, one burst per sensor.
+
+    With decimators, one per sensor, both fifos are drained through them.
+    Reads further apart than the decimated period complete several
+    outputs, their mean is returned, a read without new outputs returns
+    the previous ones.
+
+    refine, when set, receives the gyro counts of every read as a
+    sequence of XYZ samples. readTime is a RollingHistogram of the read
+    durations. A recorder gets every sample together with the angle,
+    rate, req and ack pins of pins, the last published values, so
+    replays see what kalman saw.
+    """
+
+    def __init__(self, gyro, accel, axes='X', magnetometer=False, decimators=None,
+                 readTime=None, recorder=None, pins=None):
+        self.gyro = gyro
+        self.accel = accel
+        self.axes = axes
+        self.magnetometer = magnetometer
+        self.decimators = decimators
+        self.decimated = [0.0] * 6
+        self.readTime = readTime
+        self.recorder = recorder
+        self.pins = pins
+        self.refine = None
+
+    def readDecimated(self):
+        gyroSamples = self.gyro.ReadFifoRaw()
+        if self.refine is not None:
+            self.refine(gyroSamples)
+        gyroOutputs = self.decimators[0].push(gyroSamples)
+        accelOutputs = self.decimators[1].push(self.accel.readAccelerationsFifo())
+        if len(gyroOutputs):
+            self.decimated[:3] = gyroOutputs.mean(axis=0).tolist()
+        if len(accelOutputs):
+            self.decimated[3:] = accelOutputs.mean(axis=0).tolist()
+        return tuple(self.decimated)
+
+    def read(self):
+        start = monotonic()
+        if self.decimators is not None:
+            counts = self.readDecimated()
+        else:
+            accelCounts = self.accel.readAccelerations()
+            counts = self.gyro.Get_RawOutCounts_Value(self.axes) + (accelCounts.x, accelCounts.y, accelCounts.z)
+            if self.refine is not None:
+                self.refine([counts[:3]])
+        if self.magnetometer:
+            magCounts = self.accel.readMagnetics()
+            counts += (magCounts.x, magCounts.y, magCounts.z)
+        end = monotonic()
+        if self.readTime is not None:
+            self.readTime.push(end - start)
+        if self.recorder is not None:
+            pins = self.pins
+            self.recorder.append(end, counts, pins['angle'].value, pins['rate'].value,
+                                 pins['req'].value, pins['ack'].value)
+        return counts
+
+
+class Publisher(object):
+    """Converts (timestamp, counts) samples and publishes them, then sets ack.
+
+    pins maps the HAL pin names to pins, anything with a value attribute.
+    The angle output mode uses angle, rate, dt, age, capture-time, ack,
+    invert and offset. With a roll pin the conversion is a
+    SixDofConversion and the rate-x/y/z pins present, accel-x/y/z, roll
+    and, if present, mag-x/y/z and heading are set as well, the rate pin
+    follows the first gyro rate pin.
+
+    lock is held while converting, hold it to change the calibration of
+    the conversion.
+    """
+
+    def __init__(self, conversion, pins, lock=None):
+        self.conversion = conversion
+        self.lock = lock if lock is not None else threading.Lock()
+        self.anglePin = pins['angle']
+        self.ratePin = pins['rate']
+        self.dtPin = pins['dt']
+        self.agePin = pins['age']
+        self.capturePin = pins['capture-time']
+        self.ackPin = pins['ack']
+        self.invertPin = pins['invert']
+        self.offsetPin = pins['offset']
+        self.sixDof = 'roll' in pins
+        if self.sixDof:
+            self.gyroPins = [(i, pins['rate-' + axis]) for i, axis in enumerate('xyz') if ('rate-' + axis) in pins]
+            self.accelPins = [pins['accel-' + axis] for axis in 'xyz']
+            self.rollPin = pins['roll']
+            self.magPins = [pins['mag-' + axis] for axis in 'xyz' if ('mag-' + axis) in pins]
+            self.headingPin = pins.get('heading')
+        self.oldTimestamp = monotonic()
+
+    def publishSixDof(self, counts):
+        with self.lock:
+            values, angles = self.conversion.convert(counts, self.invertPin.value, self.offsetPin.value)
+        for i, pin in self.gyroPins:
+            pin.value = values[i]
+        for i, pin in enumerate(self.accelPins):
+            pin.value = values[3 + i]
+        self.anglePin.value = angles[0]
+        self.ratePin.value = values[self.gyroPins[0][0]]
+        self.rollPin.value = angles[1]
+        for i, pin in enumerate(self.magPins):
+            pin.value = values[6 + i]
+        if self.headingPin is not None:
+            self.headingPin.value = angles[2]
+
+    def publish(self, sample):
+        newTimestamp, counts = sample
+        if self.sixDof:
+            self.publishSixDof(counts)
+        else:
+            with self.lock:
+                self.ratePin.value, self.anglePin.value = self.conversion.convert(
+                    counts, self.invertPin.value, self.offsetPin.value)
+        self.dtPin.value = newTimestamp - self.oldTimestamp
+        self.agePin.value = monotonic() - newTimestamp
+        self.capturePin.value = newTimestamp
+        self.oldTimestamp = newTimestamp
+        self.ackPin.value = 1
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+
+import unittest
+import numpy
+from Cycle import SensorReader, Publisher
+from Conversion import AngleConversion, SixDofConversion
+from Decimation import Decimator
+from LoopStats import RollingHistogram
+
+
+class Pin(object):
+
+    def __init__(self, value=0):
+        self.value = value
+
+
+class Counts(object):
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+class FakeGyro(object):
+
+    def __init__(self):
+        self.fifo = []
+
+    def Get_RawOutCounts_Value(self, axes='XYZ'):
+        return (10, 0, 0) if axes == 'X' else (10, 20, 30)
+
+    def ReadFifoRaw(self):
+        samples, self.fifo = numpy.array(self.fifo, dtype=numpy.int16).reshape(-1, 3), []
+        return samples
+
+
+class FakeAccel(object):
+
+    def __init__(self):
+        self.fifo = []
+
+    def readAccelerations(self):
+        return Counts(100, 200, 1000)
+
+    def readAccelerationsFifo(self):
+        samples, self.fifo = numpy.array(self.fifo, dtype=numpy.int16).reshape(-1, 3), []
+        return samples
+
+    def readMagnetics(self):
+        return Counts(7, 8, 9)
+
+
+class FakeRecorder(object):
+
+    def __init__(self):
+        self.records = []
+
+    def append(self, *record):
+        self.records.append(record)
+
+
+def anglePins():
+    return dict((name, Pin()) for name in ('angle', 'rate', 'dt', 'age', 'capture-time', 'req', 'ack', 'invert', 'offset'))
+
+
+class Cycle_TestCase(unittest.TestCase):
+
+    def test_Read(self):
+        pins = anglePins()
+        pins['angle'].value, pins['req'].value = 1.5, 1
+        refined = []
+        recorder = FakeRecorder()
+        readTime = RollingHistogram(0.0, 0.1)
+        reader = SensorReader(FakeGyro(), FakeAccel(), 'X', readTime=readTime, recorder=recorder, pins=pins)
+        reader.refine = refined.extend
+        self.assertEqual(reader.read(), (10, 0, 0, 100, 200, 1000))
+        self.assertEqual(refined, [(10, 0, 0)])
+        self.assertEqual(len(recorder.records), 1)
+        self.assertEqual(recorder.records[0][1:], ((10, 0, 0, 100, 200, 1000), 1.5, 0, 1, 0))
+        self.assertGreaterEqual(readTime.last, 0.0)
+
+    def test_Read_Magnetometer(self):
+        reader = SensorReader(FakeGyro(), FakeAccel(), 'XYZ', magnetometer=True)
+        self.assertEqual(reader.read(), (10, 20, 30, 100, 200, 1000, 7, 8, 9))
+
+    def test_Read_DecimatedMean(self):
+        gyro, accel = FakeGyro(), FakeAccel()
+        decimators = [Decimator(3, 2, [1.0]), Decimator(3, 2, [1.0])]
+        reader = SensorReader(gyro, accel, 'X', decimators=decimators)
+        refined = []
+        reader.refine = refined.extend
+        gyro.fifo = [(2, 0, 0), (3, 0, 0), (4, 0, 0), (5, 0, 0)]
+        accel.fifo = [(0, 0, 1000), (0, 0, 1000)]
+        self.assertEqual(reader.read(), (3.0, 0.0, 0.0, 0.0, 0.0, 1000.0))
+        self.assertEqual(len(refined), 4)
+        self.assertEqual(reader.read(), (3.0, 0.0, 0.0, 0.0, 0.0, 1000.0))  # nothing new, previous outputs
+
+    def test_Publish(self):
+        pins = anglePins()
+        conversion = AngleConversion('X', 0.5, 0.001)
+        publisher = Publisher(conversion, pins)
+        publisher.oldTimestamp = 1.0
+        publisher.publish((1.25, (10, 0, 0, 1000, 0, 1000)))
+        self.assertEqual(pins['rate'].value, 5.0)
+        self.assertAlmostEqual(pins['angle'].value, 45.0)
+        self.assertEqual(pins['dt'].value, 0.25)
+        self.assertEqual(pins['capture-time'].value, 1.25)
+        self.assertEqual(pins['ack'].value, 1)
+        publisher.publish((1.25, (10, 0, 0, 1000, 0, 1000)))
+        self.assertEqual(pins['dt'].value, 0.0)
+
+    def test_PublishSixDof(self):
+        pins = anglePins()
+        for name in ('rate-y', 'accel-x', 'accel-y', 'accel-z', 'roll', 'mag-x', 'mag-y', 'mag-z', 'heading'):
+            pins[name] = Pin()
+        publisher = Publisher(SixDofConversion(0.5, 0.001, 0.001), pins)
+        publisher.publish((1.0, (0, 4, 0, 0, 0, 1000, 500, 0, -500)))
+        self.assertEqual(pins['rate-y'].value, 2.0)
+        self.assertEqual(pins['rate'].value, 2.0)
+        self.assertEqual([pins['accel-' + axis].value for axis in 'xyz'], [0.0, 0.0, 1.0])
+        self.assertEqual([pins['mag-' + axis].value for axis in 'xyz'], [0.5, 0.0, -0.5])
+        self.assertAlmostEqual(pins['heading'].value, 135.0)
+        self.assertEqual(pins['ack'].value, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
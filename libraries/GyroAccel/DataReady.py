@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+DataReady.py
+
+Wait for sensor data-ready interrupts on a GPIO line.
+"""
+
+import errno
+import fcntl
+import os
+import select
+import time
+
+
+class EdgeWaiter(object):
+    """Blocks until the file descriptor signals an edge.
+
+    sysfs GPIO value files report edges as POLLPRI | POLLERR, other
+    descriptors (e.g. a pipe in tests) can pass select.POLLIN.
+    """
+
+    def __init__(self, fd, events=select.POLLPRI | select.POLLERR):
+        self.fd = fd
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        self.__poller = select.poll()
+        self.__poller.register(fd, events)
+        self.clear()
+
+    def clear(self):
+        """Acknowledges a pending edge"""
+        try:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+        except OSError as e:
+            if e.errno != errno.ESPIPE:
+                raise
+        try:
+            os.read(self.fd, 64)
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def wait(self, timeout):
+        """Returns True on an edge, False if timeout seconds passed without one"""
+        if not self.__poller.poll(timeout * 1000.0):
+            return False
+        self.clear()
+        return True
+
+    def close(self):
+        self.__poller.unregister(self.fd)
+        os.close(self.fd)
+
+
+class PollingWaiter(object):
+    """Fallback when no interrupt line is configured, sleeps the full timeout"""
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+def openSysfsGpio(gpio, edge='rising', sysfs='/sys/class/gpio'):
+    """Exports gpio as an input with edge detection and returns an EdgeWaiter"""
+    path = os.path.join(sysfs, 'gpio%d' % gpio)
+    if not os.path.exists(path):
+        with open(os.path.join(sysfs, 'export'), 'w') as f:
+            f.write(str(gpio))
+    with open(os.path.join(path, 'direction'), 'w') as f:
+        f.write('in')
+    with open(os.path.join(path, 'edge'), 'w') as f:
+        f.write(edge)
+    return EdgeWaiter(os.open(os.path.join(path, 'value'), os.O_RDONLY))
+
+
+def openWaiter(gpio=None, edge='rising'):
+    """Returns an EdgeWaiter for gpio, or a PollingWaiter if gpio is None"""
+    if gpio is None:
+        return PollingWaiter()
+    return openSysfsGpio(gpio, edge)
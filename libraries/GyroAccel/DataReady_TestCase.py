@@ -0,0 +1,51 @@
+#!/usr/bin/python
+
+import unittest
+import os
+import select
+import shutil
+import tempfile
+from DataReady import EdgeWaiter, PollingWaiter, openSysfsGpio, openWaiter
+
+
+class DataReady_TestCase(unittest.TestCase):
+
+    def test_EdgeWaiter(self):
+        r, w = os.pipe()
+        waiter = EdgeWaiter(r, select.POLLIN)
+        self.assertFalse(waiter.wait(0.001))
+        os.write(w, b'1')
+        self.assertTrue(waiter.wait(0.001))
+        self.assertFalse(waiter.wait(0.001))  # edge was acknowledged
+        waiter.close()
+        os.close(w)
+
+    def test_EdgeWaiter_PendingOnOpen(self):
+        r, w = os.pipe()
+        os.write(w, b'1')
+        waiter = EdgeWaiter(r, select.POLLIN)
+        self.assertFalse(waiter.wait(0.001))
+        waiter.close()
+        os.close(w)
+
+    def test_openSysfsGpio(self):
+        sysfs = tempfile.mkdtemp()
+        try:
+            open(os.path.join(sysfs, 'export'), 'w').close()
+            gpio = os.path.join(sysfs, 'gpio60')
+            os.mkdir(gpio)
+            open(os.path.join(gpio, 'value'), 'w').close()
+            waiter = openSysfsGpio(60, 'rising', sysfs)
+            self.assertEqual(open(os.path.join(gpio, 'direction')).read(), 'in')
+            self.assertEqual(open(os.path.join(gpio, 'edge')).read(), 'rising')
+            self.assertFalse(waiter.wait(0))
+            waiter.close()
+        finally:
+            shutil.rmtree(sysfs)
+
+    def test_openWaiter_Fallback(self):
+        self.assertTrue(isinstance(openWaiter(None), PollingWaiter))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Decimation.py
+
+Anti-alias low-pass and decimation of sensor FIFO batches, so
+hal_gyroaccel can oversample at the sensor data rate and publish at the
+HAL rate.
+"""
+# numpy is imported where it is needed, like in the drivers
+
+
+def firTaps(length, ratio):
+    """Hamming windowed sinc low-pass with its cutoff at the Nyquist
+    frequency of the decimated rate, unity gain at DC"""
+    import numpy
+    n = numpy.arange(length) - (length - 1) / 2.0
+    taps = numpy.sinc(n / float(ratio)) * numpy.hamming(length)
+    return taps / taps.sum()
+
+
+def cicTaps(length, ratio):
+    """Impulse response of a CIC decimator with differential delay 1, the
+    order is chosen so the response is about length samples long"""
+    import numpy
+    taps = numpy.ones(1)
+    for i in range(max(1, int(round(float(length) / ratio)))):
+        taps = numpy.convolve(taps, numpy.ones(ratio))
+    return taps / taps.sum()
+
+
+class Decimator(object):
+    """Streaming FIR filter keeping every ratio-th output.
+
+    push() takes (n, channels) batches of consecutive samples, the filter
+    state carries over between batches, so the batch boundaries do not
+    matter. The outputs lag the inputs by (len(taps) - 1) / 2 samples.
+    """
+
+    def __init__(self, channels, ratio, taps):
+        import numpy
+        self.ratio = ratio
+        self.taps = numpy.asarray(taps, dtype=float)[::-1]
+        self.history = numpy.zeros((len(self.taps) - 1, channels))
+        self.phase = 0      # Inputs since the last output, modulo ratio
+
+    @classmethod
+    def create(cls, channels, ratio, length=32, kind='fir'):
+        taps = firTaps(length, ratio) if kind == 'fir' else cicTaps(length, ratio)
+        return cls(channels, ratio, taps)
+
+    @property
+    def delay(self):
+        """Group delay in input samples"""
+        return (len(self.taps) - 1) / 2.0
+
+    def push(self, samples):
+        """Filters samples, returns the (m, channels) decimated outputs they complete"""
+        import numpy
+        samples = numpy.asarray(samples, dtype=float).reshape(-1, self.history.shape[1])
+        data = numpy.concatenate((self.history, samples))
+        first = (-self.phase) % self.ratio
+        ends = numpy.arange(first, len(samples), self.ratio)
+        windows = data[ends[:, None] + numpy.arange(len(self.taps))]
+        outputs = numpy.einsum('mtc,t->mc', windows, self.taps)
+        self.phase = (self.phase + len(samples)) % self.ratio
+        self.history = data[len(data) - len(self.history):]
+        return outputs
@@ -0,0 +1,37 @@
+#!/usr/bin/python
+
+import unittest
+import numpy
+from Decimation import Decimator, firTaps, cicTaps
+
+
+class Decimation_TestCase(unittest.TestCase):
+
+    def test_Taps_UnityGain(self):
+        self.assertAlmostEqual(firTaps(31, 4).sum(), 1.0)
+        self.assertEqual(len(cicTaps(32, 8)), 4 * 7 + 1)
+        self.assertAlmostEqual(cicTaps(32, 8).sum(), 1.0)
+
+    def test_Batches_MatchConvolution(self):
+        signal = numpy.random.RandomState(1).randn(100, 2)
+        taps = firTaps(15, 4)
+        decimator = Decimator(2, 4, taps)
+        outputs = numpy.concatenate([decimator.push(signal[a:b]) for a, b in [(0, 3), (3, 3), (3, 40), (40, 100)]])
+        expected = numpy.array([numpy.convolve(signal[:, c], taps)[:100:4] for c in range(2)]).T
+        self.assertEqual(outputs.shape, (25, 2))
+        self.assertTrue(numpy.allclose(outputs, expected))
+
+    def test_Constant(self):
+        decimator = Decimator.create(3, 8, length=32, kind='cic')
+        decimator.push(numpy.ones((64, 3)) * 5.0)
+        self.assertTrue(numpy.allclose(decimator.push(numpy.ones((8, 3)) * 5.0), 5.0))
+
+    def test_Attenuation(self):
+        decimator = Decimator.create(1, 8, length=64)
+        t = numpy.arange(800)
+        tone = numpy.sin(2 * numpy.pi * 0.25 * t)  # well above the decimated Nyquist frequency
+        self.assertLess(numpy.abs(decimator.push(tone[:, None])[10:]).max(), 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Kalman.py
+
+Python model of the kalman.comp HAL component, for replaying recorded
+sensor data offline.
+"""
+
+
+class KalmanFilter(object):
+    """The angle/bias Kalman filter of kalman.comp, one update() per
+    completed req/ack handshake. With the predict pin set, the component
+    calls predict() every thread period and update() with the period as
+    dt when a measurement arrives.
+
+    The statements and their order are those of the component, including
+    step 7 using the already corrected P[0][0] and P[0][1], so with the
+    double precision hal_float_t the results are bit-exact as long as the
+    component is not compiled with fused multiply-add contraction.
+    """
+
+    def __init__(self, qAngle=0.001, qBias=0.003, rMeasure=0.03):
+        self.qAngle = qAngle
+        self.qBias = qBias
+        self.rMeasure = rMeasure
+        self.reset()
+
+    def reset(self):
+        """State after EXTRA_SETUP"""
+        self.angle = 0.0
+        self.bias = 0.0
+        self.rate = 0.0
+        self.measuredRate = 0.0
+        self.P = [[0.0, 0.0], [0.0, 0.0]]
+
+    def predict(self, dt):
+        """Projects the state dt ahead with the rate of the last measurement"""
+        P = self.P
+        # Step 1
+        self.rate = self.measuredRate - self.bias
+        self.angle += dt * self.rate
+        # Step 2
+        P[0][0] += dt * (dt * P[1][1] - P[0][1] - P[1][0] + self.qAngle)
+        P[0][1] -= dt * P[1][1]
+        P[1][0] -= dt * P[1][1]
+        P[1][1] += self.qBias * dt
+
+    def correct(self, newAngle, latency=0.0):
+        """Corrects the predicted state with a measured angle, captured
+        latency seconds before the filter step like with the rt_dt pin"""
+        P = self.P
+        if latency > 0.0:
+            newAngle += latency * self.rate
+        # Step 4, 5
+        S = P[0][0] + self.rMeasure
+        K0 = P[0][0] / S
+        K1 = P[1][0] / S
+        # Step 3, 6
+        y = newAngle - self.angle
+        self.angle += K0 * y
+        self.bias += K1 * y
+        # Step 7
+        P[0][0] -= K0 * P[0][0]
+        P[0][1] -= K0 * P[0][1]
+        P[1][0] -= K1 * P[0][0]
+        P[1][1] -= K1 * P[0][1]
+
+    def update(self, newAngle, newRate, dt, latency=0.0):
+        """Predict and correct with one measurement, returns (angle, rate)"""
+        self.measuredRate = newRate
+        self.predict(dt)
+        self.correct(newAngle, latency)
+        return self.angle, self.rate
+
+
+class KalmanBank(object):
+    """KalmanFilter run for many (qAngle, qBias, rMeasure) combinations at
+    once, the parameters are broadcast against each other and every
+    element has its own filter state.
+
+    update() performs the operations of KalmanFilter.update element-wise
+    in the same order, so every element matches the scalar filter
+    bit for bit.
+    """
+
+    def __init__(self, qAngle, qBias, rMeasure):
+        import numpy
+        self.qAngle, self.qBias, self.rMeasure = [numpy.array(v, dtype=float) for v in
+                                                   numpy.broadcast_arrays(qAngle, qBias, rMeasure)]
+        self.shape = self.qAngle.shape
+        self.reset()
+
+    def reset(self):
+        import numpy
+        self.angle, self.bias, self.rate = [numpy.zeros(self.shape) for i in range(3)]
+        self.P00, self.P01, self.P10, self.P11 = [numpy.zeros(self.shape) for i in range(4)]
+        self.__t, self.__y, self.__K0, self.__K1 = [numpy.zeros(self.shape) for i in range(4)]
+
+    def update(self, newAngle, newRate, dt):
+        """Predict and correct all filters with one measurement, returns the
+        (angle, rate) state arrays, they are updated in place by the next call"""
+        import numpy
+        t, y, K0, K1 = self.__t, self.__y, self.__K0, self.__K1
+        # Step 1
+        numpy.subtract(newRate, self.bias, out=self.rate)
+        numpy.multiply(self.rate, dt, out=t)
+        self.angle += t
+        # Step 2
+        numpy.multiply(self.P11, dt, out=t)
+        t -= self.P01
+        t -= self.P10
+        t += self.qAngle
+        t *= dt
+        self.P00 += t
+        numpy.multiply(self.P11, dt, out=t)
+        self.P01 -= t
+        self.P10 -= t
+        numpy.multiply(self.qBias, dt, out=t)
+        self.P11 += t
+        # Step 4, 5
+        numpy.add(self.P00, self.rMeasure, out=t)
+        numpy.divide(self.P00, t, out=K0)
+        numpy.divide(self.P10, t, out=K1)
+        # Step 3, 6
+        numpy.subtract(newAngle, self.angle, out=y)
+        numpy.multiply(K0, y, out=t)
+        self.angle += t
+        numpy.multiply(K1, y, out=t)
+        self.bias += t
+        # Step 7
+        numpy.multiply(K0, self.P00, out=t)
+        self.P00 -= t
+        numpy.multiply(K0, self.P01, out=t)
+        self.P01 -= t
+        numpy.multiply(K1, self.P00, out=t)
+        self.P10 -= t
+        numpy.multiply(K1, self.P01, out=t)
+        self.P11 -= t
+        return self.angle, self.rate
+
+    def run(self, newAngles, newRates, dts, out):
+        """Updates with a sequence of measurements, out[i] receives the angles after the i-th"""
+        for i in range(len(dts)):
+            out[i] = self.update(newAngles[i], newRates[i], dts[i])[0]
+        return out
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+
+import unittest
+import numpy
+from Kalman import KalmanFilter, KalmanBank
+
+
+class Kalman_TestCase(unittest.TestCase):
+
+    def test_ConvergesToMeasurement(self):
+        kalman = KalmanFilter()
+        for i in range(2000):
+            angle, rate = kalman.update(10.0, 0.0, 0.01)
+        self.assertAlmostEqual(angle, 10.0, places=3)
+        self.assertAlmostEqual(rate, 0.0, places=2)
+
+    def test_EstimatesGyroBias(self):
+        kalman = KalmanFilter()
+        for i in range(5000):
+            kalman.update(0.0, 2.0, 0.01)
+        self.assertAlmostEqual(kalman.bias, 2.0, places=2)
+
+    def test_FirstUpdate(self):
+        # P starts at 0, so the first correction only sees the predicted covariance
+        kalman = KalmanFilter(qAngle=0.5, qBias=0.0, rMeasure=0.5)
+        angle, rate = kalman.update(4.0, 1.0, 1.0)
+        self.assertEqual(rate, 1.0)
+        self.assertEqual(angle, 1.0 + 0.5 * (4.0 - 1.0))
+        self.assertEqual(kalman.P, [[0.25, 0.0], [0.0, 0.0]])
+
+    def test_PredictBetweenMeasurements(self):
+        kalman = KalmanFilter()
+        kalman.update(0.0, 10.0, 0.01)
+        angle, bias = kalman.angle, kalman.bias
+        kalman.predict(0.001)
+        self.assertEqual(kalman.angle, angle + 0.001 * (10.0 - bias))
+        self.assertEqual(kalman.bias, bias)
+        self.assertGreater(kalman.P[0][0], 0.0)
+
+    def test_LatencyCompensation(self):
+        late, projected = KalmanFilter(), KalmanFilter()
+        late.update(0.0, 10.0, 0.01, latency=0.02)
+        projected.update(0.2, 10.0, 0.01)
+        self.assertEqual(late.angle, projected.angle)
+
+    def test_Bank_MatchesScalar(self):
+        qAngle, qBias, rMeasure = [0.001, 0.01], [[0.003], [0.3]], 0.03
+        bank = KalmanBank(qAngle, qBias, rMeasure)
+        self.assertEqual(bank.shape, (2, 2))
+        random = numpy.random.RandomState(1)
+        measurements = list(zip(random.randn(50) * 5.0, random.randn(50) + 1.0, random.uniform(0.01, 0.03, 50)))
+        out = bank.run(*zip(*measurements), out=numpy.zeros((50, 2, 2)))
+        for (i, j), value in numpy.ndenumerate(bank.qAngle):
+            kalman = KalmanFilter(bank.qAngle[i, j], bank.qBias[i, j], bank.rMeasure[i, j])
+            angles = [kalman.update(*measurement)[0] for measurement in measurements]
+            self.assertEqual(out[:, i, j].tolist(), angles)
+            self.assertEqual(bank.rate[i, j], kalman.rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
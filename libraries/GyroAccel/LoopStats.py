@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+LoopStats.py
+
+Timing statistics of the hal_gyroaccel loop, cheap enough to update on
+every iteration.
+"""
+
+
+class RollingHistogram(object):
+    """Histogram of the last window values of a series.
+
+    bins equally wide bins cover [low, high), values outside are counted
+    in the first or last bin. push() is O(1), percentile() scans the bins
+    and is only as exact as the bin width. minimum, maximum and last are
+    exact and span everything pushed since the last reset().
+    """
+
+    def __init__(self, low, high, bins=100, window=1000):
+        self.low = low
+        self.width = float(high - low) / bins
+        self.bins = bins
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.bins
+        self.__ring = [0] * self.window
+        self.count = 0
+        self.last = 0.0
+        self.minimum = 0.0
+        self.maximum = 0.0
+
+    def push(self, value):
+        index = min(max(int((value - self.low) / self.width), 0), self.bins - 1)
+        slot = self.count % self.window
+        if self.count >= self.window:
+            self.counts[self.__ring[slot]] -= 1
+        self.__ring[slot] = index
+        self.counts[index] += 1
+        if self.count == 0 or value < self.minimum:
+            self.minimum = value
+        if self.count == 0 or value > self.maximum:
+            self.maximum = value
+        self.last = value
+        self.count += 1
+
+    def percentile(self, p):
+        """Upper edge of the bin holding the p-th percentile of the window,
+        limited to the exact minimum and maximum, 0.0 if empty"""
+        n = min(self.count, self.window)
+        if n == 0:
+            return 0.0
+        target = p / 100.0 * n
+        total = 0
+        for index, count in enumerate(self.counts):
+            total += count
+            if total >= target:
+                break
+        return min(max(self.low + (index + 1) * self.width, self.minimum), self.maximum)
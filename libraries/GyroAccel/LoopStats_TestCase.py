@@ -0,0 +1,48 @@
+#!/usr/bin/python
+
+import unittest
+from LoopStats import RollingHistogram
+
+
+class LoopStats_TestCase(unittest.TestCase):
+
+    def test_Empty(self):
+        histogram = RollingHistogram(0.0, 1.0, bins=10, window=4)
+        self.assertEqual(histogram.percentile(99), 0.0)
+        self.assertEqual((histogram.minimum, histogram.maximum, histogram.last), (0.0, 0.0, 0.0))
+
+    def test_Percentile(self):
+        histogram = RollingHistogram(0.0, 1.0, bins=10, window=100)
+        for i in range(100):
+            histogram.push(i / 100.0)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5)
+        self.assertAlmostEqual(histogram.percentile(90), 0.9)
+        self.assertAlmostEqual(histogram.percentile(99), 0.99)
+        self.assertEqual((histogram.minimum, histogram.maximum, histogram.last), (0.0, 0.99, 0.99))
+
+    def test_Window(self):
+        histogram = RollingHistogram(0.0, 1.0, bins=10, window=4)
+        for value in [0.95] * 4 + [0.05] * 4:
+            histogram.push(value)
+        self.assertEqual(sum(histogram.counts), 4)
+        self.assertAlmostEqual(histogram.percentile(100), 0.1)
+        self.assertEqual(histogram.maximum, 0.95)
+
+    def test_OutOfRange(self):
+        histogram = RollingHistogram(0.0, 1.0, bins=10, window=4)
+        histogram.push(-1.0)
+        histogram.push(5.0)
+        self.assertEqual((histogram.counts[0], histogram.counts[9]), (1, 1))
+        self.assertEqual((histogram.minimum, histogram.maximum), (-1.0, 5.0))
+
+    def test_Reset(self):
+        histogram = RollingHistogram(0.0, 1.0, bins=10, window=4)
+        histogram.push(0.5)
+        histogram.reset()
+        self.assertEqual((histogram.count, sum(histogram.counts)), (0, 0))
+        histogram.push(0.7)
+        self.assertEqual(histogram.minimum, 0.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Recorder.py
+
+Flight recorder of the raw sensor samples of hal_gyroaccel, kept in
+memory-mapped NumPy files.
+"""
+# numpy is imported where it is needed, like in the drivers
+
+import glob
+import os
+import re
+import threading
+
+RECORD_FIELDS = [('timestamp', '<f8'),      # monotonic capture time, 0 for unwritten records
+                 ('gyro', '<f4', (3,)),     # raw counts, decimated counts with --decimate
+                 ('accel', '<f4', (3,)),
+                 ('mag', '<f4', (3,)),      # 0 unless the magnetometer is read
+                 ('angle', '<f8'),          # angle and rate on the pins when the sample was read
+                 ('rate', '<f8'),
+                 ('req', 'u1'),
+                 ('ack', 'u1')]
+
+
+def recordType():
+    import numpy
+    return numpy.dtype(RECORD_FIELDS)
+
+
+class Recorder(object):
+    """Appends samples to preallocated, memory-mapped .npy files.
+
+    Files are named prefix-0000.npy, prefix-0001.npy, ... and hold
+    capacity records each, numbering continues after existing files so
+    a restart never overwrites the last capture, only the unwritten
+    spare file of the previous run is reused. A background thread
+    creates and faults in the next file while the current one fills,
+    and flushes the previous one. Whenever a file is created all files
+    of the prefix except the newest keep ones and the spare are
+    deleted, including those of earlier runs. append() never touches
+    the file system,
+    samples are dropped and counted if the next file is not ready in
+    time.
+
+    Read a capture with numpy.load(path, mmap_mode='r').
+    """
+
+    def __init__(self, prefix, capacity=65536, keep=8):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.keep = keep
+        self.dropped = 0
+        self.index = 0
+        self.sequence = self.__firstSequence()
+        self.current = self.__create(self.sequence)
+        self.__next = None
+        self.__worker = None
+        self.__prepare(None)
+
+    def __sequences(self):
+        pattern = re.compile(re.escape(os.path.basename(self.prefix)) + r'-(\d+)\.npy$')
+        return sorted(int(match.group(1)) for match in
+                      (pattern.match(os.path.basename(path)) for path in glob.glob(self.prefix + '-*.npy')) if match)
+
+    def __firstSequence(self):
+        import numpy
+        sequences = self.__sequences()
+        if not sequences:
+            return 0
+        try:
+            records = numpy.load(self.path(sequences[-1]), mmap_mode='r')
+            unwritten = (records.dtype == recordType()) and ((len(records) == 0) or (records['timestamp'][0] == 0.0))
+        except (IOError, ValueError):
+            unwritten = False
+        return sequences[-1] if unwritten else sequences[-1] + 1
+
+    def path(self, sequence):
+        return '%s-%04d.npy' % (self.prefix, sequence)
+
+    def __create(self, sequence):
+        import numpy.lib.format
+        records = numpy.lib.format.open_memmap(self.path(sequence), mode='w+', dtype=recordType(), shape=(self.capacity,))
+        records.view(numpy.uint8)[:] = 0  # fault in every page now, not on the hot path
+        for old in self.__sequences():
+            if old < sequence - self.keep:  # keep files besides the newest, the spare once running
+                os.remove(self.path(old))
+        return records
+
+    def __prepare(self, previous):
+        def work():
+            if previous is not None:
+                previous.flush()
+            self.__next = self.__create(self.sequence + 1)
+        self.__worker = threading.Thread(target=work)
+        self.__worker.daemon = True
+        self.__worker.start()
+
+    def append(self, timestamp, counts, angle, rate, req, ack):
+        """Records one sample, counts are gyro XYZ, accel XYZ and optionally mag XYZ"""
+        if self.index == self.capacity:
+            if self.__next is None:
+                self.dropped += 1
+                return
+            previous = self.current
+            self.current, self.__next = self.__next, None
+            self.sequence += 1
+            self.index = 0
+            self.__prepare(previous)
+        # a single record assignment is about twice as fast as assigning the fields
+        self.current[self.index] = (timestamp, counts[0:3], counts[3:6], counts[6:9] or (0, 0, 0),
+                                    angle, rate, req, ack)
+        self.index += 1
+
+    def close(self):
+        self.__worker.join()
+        self.current.flush()
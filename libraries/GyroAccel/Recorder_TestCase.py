@@ -0,0 +1,69 @@
+#!/usr/bin/python
+
+import unittest
+import os
+import shutil
+import tempfile
+import numpy
+from Recorder import Recorder
+
+
+class Recorder_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, 'capture')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_Append(self):
+        recorder = Recorder(self.prefix, capacity=4)
+        recorder.append(1.5, (1, 2, 3, 4, 5, 6), 10.0, -2.0, 1, 0)
+        recorder.append(2.5, (7, 8, 9, 10, 11, 12, 13, 14, 15), 11.0, -3.0, 0, 1)
+        recorder.close()
+        records = numpy.load(recorder.path(0), mmap_mode='r')
+        self.assertEqual(records.shape, (4,))
+        self.assertEqual(records['timestamp'].tolist(), [1.5, 2.5, 0.0, 0.0])
+        self.assertEqual(records['gyro'][1].tolist(), [7, 8, 9])
+        self.assertEqual(records['accel'][0].tolist(), [4, 5, 6])
+        self.assertEqual(records['mag'].tolist()[:2], [[0, 0, 0], [13, 14, 15]])
+        self.assertEqual(records['angle'][:2].tolist(), [10.0, 11.0])
+        self.assertEqual((records['req'][0], records['ack'][0]), (1, 0))
+
+    def test_Rotation(self):
+        recorder = Recorder(self.prefix, capacity=2, keep=2)
+        for i in range(7):
+            recorder.close()  # wait for the next file, otherwise samples are dropped
+            recorder.append(i + 1.0, (i,) * 6, 0.0, 0.0, 0, 0)
+        recorder.close()
+        self.assertEqual(recorder.dropped, 0)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['capture-0002.npy', 'capture-0003.npy', 'capture-0004.npy'])
+        self.assertEqual(numpy.load(recorder.path(3))['timestamp'].tolist(), [7.0, 0.0])
+
+    def test_Restart_ContinuesNumbering(self):
+        recorder = Recorder(self.prefix, capacity=2)
+        recorder.append(1.0, (1,) * 6, 0.0, 0.0, 0, 0)
+        recorder.close()
+        recorder = Recorder(self.prefix, capacity=2)
+        recorder.close()
+        self.assertEqual(recorder.sequence, 1)  # reuses the unwritten spare of the first run
+        self.assertEqual(numpy.load(recorder.path(0))['timestamp'].tolist(), [1.0, 0.0])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['capture-0000.npy', 'capture-0001.npy', 'capture-0002.npy'])
+
+    def test_Restart_RemovesOldFiles(self):
+        # captures of earlier runs with gaps in the numbering
+        for sequence in (0, 1, 3, 9):
+            recorder = Recorder(self.prefix + '-old', capacity=2)
+            recorder.append(1.0, (1,) * 6, 0.0, 0.0, 0, 0)
+            recorder.close()
+            os.rename(recorder.path(0), recorder.path(0).replace('-old-0000', '-%04d' % sequence))
+            os.remove(recorder.path(1))
+        recorder = Recorder(self.prefix, capacity=2, keep=2)
+        recorder.close()
+        self.assertEqual(recorder.sequence, 10)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['capture-0009.npy', 'capture-0010.npy', 'capture-0011.npy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Replay.py
+
+Reading and converting hal_gyroaccel records for the offline tools.
+"""
+# numpy is imported where it is needed, like in the drivers
+
+import glob
+import os
+
+from Recorder import recordType
+from CalibrationCache import CalibrationCache
+from Conversion import AngleConversion
+
+RESULT_FIELDS = [('timestamp', '<f8'),
+                 ('dt', '<f8'),
+                 ('angle', '<f8'),          # conversion output, the kalman new-angle and new-rate
+                 ('rate', '<f8'),
+                 ('kalman_angle', '<f8'),
+                 ('kalman_rate', '<f8')]
+
+
+def recordFiles(names):
+    """Record files, names are files or prefixes as passed to hal_gyroaccel --record"""
+    files = []
+    for name in names:
+        files += [name] if os.path.isfile(name) else sorted(glob.glob(name + '-*.npy'))
+    return files
+
+
+def recordChunks(files, size=65536, pending=False):
+    """Yields the written records of the files in chunks of at most size,
+    with pending only those read while a req was pending"""
+    import numpy
+    for path in files:
+        records = numpy.load(path, mmap_mode='r')
+        if records.dtype != recordType():
+            raise ValueError('{0} is not a hal_gyroaccel record file'.format(path))
+        for start in range(0, len(records), size):
+            chunk = records[start:start + size]
+            chunk = chunk[chunk['timestamp'] > 0.0]
+            if pending:
+                chunk = chunk[(chunk['req'] == 1) & (chunk['ack'] == 0)]
+            if len(chunk):
+                yield chunk
+
+
+def angleConversion(calibrationFile, axis='X', gain=0.00875, accelFactor=0.001, section=None):
+    """Returns the AngleConversion of hal_gyroaccel with the calibration of
+    the given or newest calibration cache section and the section used,
+    None and no calibration if the cache is empty"""
+    calibration = dict.fromkeys(['min' + axis, 'mean' + axis, 'max' + axis], 0.0)
+    entries = CalibrationCache(calibrationFile).entries()
+    if section is None and entries:
+        section = max(entries, key=lambda name: entries[name]['timestamp'])
+    if section is not None:
+        if section not in entries:
+            raise KeyError('no calibration section {0} in {1}'.format(section, calibrationFile))
+        calibration.update(entries[section])
+    conversion = AngleConversion(axis, gain, accelFactor)
+    low, mean, high = [[0.0] * 3 for stat in range(3)]
+    index = 'XYZ'.index(axis)
+    low[index], mean[index], high[index] = [calibration[stat + axis] for stat in ('min', 'mean', 'max')]
+    conversion.setCalibration(low, mean, high)
+    return conversion, section
+
+
+class Measurements(object):
+    """Converts record chunks to the kalman inputs, carrying the timestamp
+    across chunks so dt is continuous, the first dt is 0"""
+
+    def __init__(self, conversion, invert=False, offset=0.0):
+        self.conversion = conversion
+        self.invert = invert
+        self.offset = offset
+        self.first = None
+        self.last = None
+
+    def convert(self, chunk):
+        """Returns the lists (timestamps, dts, angles, rates) of a chunk"""
+        import numpy
+        counts = numpy.concatenate((chunk['gyro'], chunk['accel']), axis=1).tolist()
+        timestamps = chunk['timestamp'].tolist()
+        if self.last is None:
+            self.first = self.last = timestamps[0]
+        dts = [b - a for a, b in zip([self.last] + timestamps[:-1], timestamps)]
+        self.last = timestamps[-1]
+        rates, angles = zip(*[self.conversion.convert(c, self.invert, self.offset) for c in counts])
+        return timestamps, dts, list(angles), list(rates)
+
+    @property
+    def span(self):
+        return self.last - self.first if self.last is not None else 0.0
+
+
+def filterSample(kalman, angle, rate, dt, predict=None):
+    """One req/ack handshake of kalman.comp, with predict the thread period
+    of its predict pin mode, the cycles between samples are rounded from dt"""
+    if predict is None:
+        return kalman.update(angle, rate, dt)
+    for cycle in range(int(round(dt / predict)) - 1):
+        kalman.predict(predict)
+    return kalman.update(angle, rate, predict)
+
+
+def replay(chunks, measurements, kalman, predict=None, results=None):
+    """Runs record chunks through measurements and kalman, returns the
+    number of samples and the maximum deviation of the replayed angles
+    from the angle pins recorded with the next sample. With a results
+    list a RESULT_FIELDS array is appended per chunk."""
+    import numpy
+    samples = 0
+    deviation = 0.0     # the pins recorded with a sample were published from the previous one
+    lastAngle = None
+    for chunk in chunks:
+        timestamps, dts, angles, rates = measurements.convert(chunk)
+        recordedAngles = chunk['angle'].tolist()
+        if lastAngle is not None:
+            deviation = max(deviation, abs(recordedAngles[0] - lastAngle))
+        deviation = max([deviation] + [abs(a - b) for a, b in zip(recordedAngles[1:], angles)])
+        lastAngle = angles[-1]
+        result = [(timestamp, dt, angle, rate) + filterSample(kalman, angle, rate, dt, predict)
+                  for timestamp, dt, angle, rate in zip(timestamps, dts, angles, rates)]
+        samples += len(chunk)
+        if results is not None:
+            results.append(numpy.array(result, dtype=RESULT_FIELDS))
+    return samples, deviation
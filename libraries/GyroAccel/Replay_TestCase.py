@@ -0,0 +1,133 @@
+#!/usr/bin/python
+
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from Recorder import Recorder
+from Conversion import AngleConversion
+from CalibrationCache import CalibrationCache
+from Cycle import SensorReader, Publisher
+from Kalman import KalmanFilter
+from Replay import recordFiles, recordChunks, angleConversion, Measurements, replay
+
+# the drivers and the simulated bus for a capture like hal_gyroaccel's
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from libraries.Gyrometer.L3GD20 import L3GD20
+from libraries.Accelerometer.Adafruit_LSM303DLHC import LSM303DLHC
+from libraries.Bus.SimulatedBus import SimulatedBus, defaultDevices
+
+
+class Pin(object):
+    value = 0
+
+
+class Replay_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, 'capture')
+        recorder = Recorder(self.prefix, capacity=4)
+        for i in range(6):
+            recorder.close()
+            recorder.append(10.0 + 0.5 * i, (i, 0, 0, 0, 0, 1000), 0.0, 0.0, i % 2, 0)
+        recorder.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_Chunks(self):
+        files = recordFiles([self.prefix])
+        self.assertEqual([os.path.basename(path) for path in files],
+                         ['capture-0000.npy', 'capture-0001.npy', 'capture-0002.npy'])
+        chunks = list(recordChunks(files, size=3))
+        self.assertEqual([chunk['timestamp'].tolist() for chunk in chunks], [[10.0, 10.5, 11.0], [11.5], [12.0, 12.5]])
+        pending = list(recordChunks(files, size=3, pending=True))
+        self.assertEqual(sum(len(chunk) for chunk in pending), 3)
+
+    def test_Measurements_ContinuousDt(self):
+        measurements = Measurements(AngleConversion('X', 0.5, 0.001))
+        results = [measurements.convert(chunk) for chunk in recordChunks(recordFiles([self.prefix]), size=3)]
+        self.assertEqual(sum([dts for timestamps, dts, angles, rates in results], []), [0.0] + [0.5] * 5)
+        self.assertEqual(sum([rates for timestamps, dts, angles, rates in results], []), [0.5 * i for i in range(6)])
+        self.assertEqual(measurements.span, 2.5)
+
+
+class ReplayCapture_TestCase(unittest.TestCase):
+    """Replays a capture of the hal_gyroaccel read and publish path on the simulated bus"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, 'capture')
+        self.calibrationFile = os.path.join(self.directory, 'calibration.ini')
+        self.now = 0.0
+        bus = SimulatedBus(defaultDevices(seed=1), speed=None, clock=lambda: self.now)
+        gyro = L3GD20(busId=1, slaveAddr=0x6B, ifLog=False, ifWriteBlock=False, bus=bus)
+        accel = LSM303DLHC(address_accel=0x19, address_mag=0x1E, debug=False, busId=1, bus=bus)
+        with gyro.Configure():
+            gyro.Set_PowerMode("Normal")
+            gyro.Set_FullScale_Value("250dps")
+        gyro.Init()
+        # an older entry of another temperature band and the one hal_gyroaccel used
+        self.cache = CalibrationCache(self.calibrationFile)
+        self.cache.store(0x6b, '250dps', 40.0, {'minX': -1.0, 'meanX': 0.0, 'maxX': 1.0}, now=1000.0)
+        self.key = (0x6b, '250dps', 21.0)
+        self.cache.store(*self.key, values={'minX': 0.4, 'meanX': 0.5, 'maxX': 0.6}, now=2000.0)
+        conversion = AngleConversion('X', gyro.gain, accel.accelFactor)
+        conversion.setCalibration((0.4, 0.0, 0.0), (0.5, 0.0, 0.0), (0.6, 0.0, 0.0))
+
+        pins = dict((name, Pin()) for name in ('angle', 'rate', 'dt', 'age', 'capture-time', 'req', 'ack', 'invert', 'offset'))
+        recorder = Recorder(self.prefix, capacity=16)
+        reader = SensorReader(gyro, accel, 'X', recorder=recorder, pins=pins)
+        publisher = Publisher(conversion, pins)
+        self.published = []
+        for i in range(20):
+            recorder.close()  # wait for the next file, otherwise samples are dropped
+            self.now += 0.01
+            reader.read()  # read by the acquisition thread without a req, never published
+            self.now += 0.01
+            pins['req'].value = 1
+            publisher.publish((self.now, reader.read()))
+            self.published.append(pins['angle'].value)
+            pins['req'].value = 0
+            pins['ack'].value = 0
+        recorder.close()
+        self.assertEqual(recorder.dropped, 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_CalibrationKey(self):
+        conversion, section = angleConversion(self.calibrationFile)
+        self.assertEqual(section, self.cache.section(*self.key))
+        self.assertEqual((conversion.low, conversion.mean, conversion.high), (0.4, 0.5, 0.6))
+        self.assertRaises(KeyError, angleConversion, self.calibrationFile, section='0x6b-250dps-1')
+
+    def test_BitExact(self):
+        conversion, section = angleConversion(self.calibrationFile, gain=0.00875)
+        results = []
+        samples, deviation = replay(recordChunks(recordFiles([self.prefix]), size=7, pending=True),
+                                    Measurements(conversion), KalmanFilter(), results=results)
+        self.assertEqual(samples, 20)
+        self.assertEqual(deviation, 0.0)
+        self.assertEqual(sum([result['angle'].tolist() for result in results], []), self.published)
+
+    def test_AllSamples_Deviate(self):
+        conversion, section = angleConversion(self.calibrationFile, gain=0.00875)
+        samples, deviation = replay(recordChunks(recordFiles([self.prefix])), Measurements(conversion), KalmanFilter())
+        self.assertEqual(samples, 40)
+        self.assertGreater(deviation, 0.0)  # the reads without a req were never published
+
+    def test_Predict(self):
+        conversion, section = angleConversion(self.calibrationFile, gain=0.00875)
+        chunks = list(recordChunks(recordFiles([self.prefix]), pending=True))
+        kalman, predicted = KalmanFilter(), KalmanFilter()
+        replay(chunks, Measurements(conversion), kalman)
+        replay(chunks, Measurements(conversion), predicted, predict=0.01)
+        self.assertNotEqual(kalman.angle, predicted.angle)
+        self.assertAlmostEqual(kalman.angle, predicted.angle, places=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# encoding: utf-8
+"""
+Tuning.py
+
+Cost, ranking and storage of kalman.comp parameters for tune_kalman.
+"""
+# numpy is imported where it is needed, like in the drivers
+
+import math
+import os
+import re
+
+
+def parameterGrid(text):
+    """low:high:count for count log spaced values, otherwise a comma separated list"""
+    import numpy
+    if ':' in text:
+        low, high, count = text.split(':')
+        return numpy.logspace(math.log10(float(low)), math.log10(float(high)), int(count))
+    return numpy.array([float(value) for value in text.split(',')])
+
+
+class Cost(object):
+    """Accumulates the cost terms of a batch of filters over consecutive chunks.
+
+    lag is the mean squared difference between the filtered angle and a
+    zero phase reference, a centered moving average of window measured
+    angles, noise the variance of the sample to sample change of the
+    filtered angle. The chunk boundaries do not change either.
+    """
+
+    def __init__(self, combinations, window):
+        import numpy
+        self.window = window
+        self.measured = numpy.zeros(0)              # last window - 1 samples of the previous chunks
+        self.filtered = numpy.zeros((0, combinations))
+        self.last = None                            # last filtered angles of the previous chunk
+        self.errors = numpy.zeros(combinations)
+        self.errorCount = 0
+        self.steps = numpy.zeros(combinations)
+        self.stepSquares = numpy.zeros(combinations)
+        self.stepCount = 0
+
+    def push(self, angles, outputs):
+        """angles are the measured angles of a chunk, outputs the (n, combinations) filtered ones"""
+        import numpy
+        if self.last is not None:
+            steps = numpy.diff(numpy.concatenate((self.last[None], outputs)), axis=0)
+        else:
+            steps = numpy.diff(outputs, axis=0)
+        self.steps += steps.sum(axis=0)
+        self.stepSquares += (steps ** 2).sum(axis=0)
+        self.stepCount += len(steps)
+        self.last = outputs[-1].copy()
+
+        measured = numpy.concatenate((self.measured, angles))
+        filtered = numpy.concatenate((self.filtered, outputs))
+        if len(measured) >= self.window:
+            sums = numpy.cumsum(numpy.concatenate(([0.0], measured)))
+            reference = (sums[self.window:] - sums[:-self.window]) / self.window
+            center = (self.window - 1) // 2
+            errors = filtered[center:center + len(reference)] - reference[:, None]
+            self.errors += (errors ** 2).sum(axis=0)
+            self.errorCount += len(reference)
+        keep = self.window - 1  # so every window is evaluated exactly once
+        self.measured = measured[len(measured) - keep:]
+        self.filtered = filtered[len(filtered) - keep:]
+
+    @property
+    def lag(self):
+        return self.errors / max(self.errorCount, 1)
+
+    @property
+    def noise(self):
+        count = max(self.stepCount, 1)
+        return self.stepSquares / count - (self.steps / count) ** 2
+
+
+def rankCosts(lags, noises, lagWeight=1.0, noiseWeight=1.0):
+    """Returns the costs and the indices of the combinations from the lowest
+    cost, ties keep their order"""
+    import numpy
+    costs = lagWeight * numpy.asarray(lags) + noiseWeight * numpy.asarray(noises)
+    return costs, numpy.argsort(costs, kind='mergesort')
+
+
+def storeParameters(path, section, qAngle, qBias, rMeasure):
+    """Sets qangle, qbias and rmeasure of section in a hal_storage ini file.
+    Only their lines change, the rest of the file, e.g. the PID gains
+    hal_storage autosaves, is kept byte for byte. A missing section or key
+    is appended."""
+    values = [('qangle', qAngle), ('qbias', qBias), ('rmeasure', rMeasure)]
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines(True)
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    header = '[%s]' % section
+    starts = [i for i, line in enumerate(lines) if line.strip() == header]
+    if not starts:
+        if lines and lines[-1].strip():
+            lines.append('\n')
+        lines += [header + '\n', '\n']
+        starts = [len(lines) - 2]
+    start = end = starts[0] + 1
+    while (end < len(lines)) and not lines[end].lstrip().startswith('['):
+        end += 1
+    body = lines[start:end]
+    for key, value in values:
+        line = '%s = %r\n' % (key, float(value))
+        matches = [i for i, old in enumerate(body) if re.split('[=:]', old, 1)[0].strip().lower() == key]
+        if matches:
+            body[matches[0]] = line
+        else:
+            filled = [i for i, old in enumerate(body) if old.strip()]
+            body.insert(filled[-1] + 1 if filled else 0, line)
+    lines[start:end] = body
+    with open(path + '.tmp', 'w') as f:
+        f.write(''.join(lines))
+    os.rename(path + '.tmp', path)
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from Tuning import parameterGrid, Cost, rankCosts, storeParameters
+
+try:
+    import ConfigParser as configparser
+except ImportError:
+    import configparser
+
+
+STORAGE = ('[MR]\n'
+           'pgain = 2.14699475516\n'
+           'igain = 149.877469819\n'
+           'dgain = 0.00768892496692\n'
+           '\n'
+           '[KALMAN]\n'
+           'qangle = 0.001\n'
+           'qbias = 0.003\n'
+           'rmeasure = 0.03\n'
+           '\n'
+           '[POS]\n'
+           'pgain = 1.0\n'
+           'igain = 1.0\n'
+           'dgain = 1.0\n'
+           '\n')
+
+
+def reference(angles, window):
+    """The centered moving average Cost compares with, the raw angles where
+    the window does not fit"""
+    sums = numpy.cumsum(numpy.concatenate(([0.0], angles)))
+    averaged = angles.copy()
+    center = (window - 1) // 2
+    averaged[center:center + len(angles) - window + 1] = (sums[window:] - sums[:-window]) / window
+    return averaged
+
+
+def knownTrace(count=400, window=5):
+    """A sine and three filter outputs: its reference, the reference ten
+    samples late and the reference with noise"""
+    times = numpy.arange(count) * 0.05
+    angles = 10.0 * numpy.sin(times)
+    exact = reference(angles, window)
+    delayed = reference(10.0 * numpy.sin(times - 0.5), window)
+    noisy = exact + numpy.random.RandomState(1).normal(0.0, 0.5, count)
+    return angles, numpy.column_stack((noisy, exact, delayed))
+
+
+class Tuning_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'storage.ini')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ParameterGrid(self):
+        numpy.testing.assert_allclose(parameterGrid('1e-3:1e-1:3'), [1e-3, 1e-2, 1e-1])
+        self.assertEqual(parameterGrid('0.5,2').tolist(), [0.5, 2.0])
+
+    def test_Cost(self):
+        angles, outputs = knownTrace()
+        cost = Cost(3, 5)
+        cost.push(angles, outputs)
+        self.assertAlmostEqual(cost.lag[1], 0.0)
+        self.assertGreater(cost.lag[2], cost.lag[0])
+        self.assertGreater(cost.noise[0], cost.noise[1])
+        self.assertGreater(cost.noise[0], cost.noise[2])
+        costs, ranking = rankCosts(cost.lag, cost.noise)
+        self.assertEqual(ranking.tolist(), [1, 0, 2])
+        self.assertEqual(rankCosts(cost.lag, cost.noise, 1.0, 0.0)[1][0], 1)
+        self.assertEqual(rankCosts(cost.lag, cost.noise, 0.0, 1.0)[1][-1], 0)
+
+    def test_Cost_Chunks(self):
+        angles, outputs = knownTrace()
+        whole = Cost(3, 5)
+        whole.push(angles, outputs)
+        chunked = Cost(3, 5)
+        for first in range(0, len(angles), 7):
+            chunked.push(angles[first:first + 7], outputs[first:first + 7])
+        numpy.testing.assert_allclose(chunked.lag, whole.lag, atol=1e-12)
+        numpy.testing.assert_allclose(chunked.noise, whole.noise, atol=1e-12)
+
+    def test_RankCosts_Ties(self):
+        costs, ranking = rankCosts([1.0, 0.5, 1.0, 0.5], [0.0, 0.0, 0.0, 0.0])
+        self.assertEqual(costs.tolist(), [1.0, 0.5, 1.0, 0.5])
+        self.assertEqual(ranking.tolist(), [1, 3, 0, 2])
+
+    def test_StoreParameters(self):
+        with open(self.path, 'w') as f:
+            f.write(STORAGE)
+        storeParameters(self.path, 'KALMAN', 0.01, 0.002, 0.5)
+        with open(self.path) as f:
+            stored = f.read()
+        self.assertEqual(stored, STORAGE.replace('qangle = 0.001', 'qangle = 0.01')
+                         .replace('qbias = 0.003', 'qbias = 0.002').replace('rmeasure = 0.03', 'rmeasure = 0.5'))
+        config = configparser.RawConfigParser()
+        config.read(self.path)
+        self.assertEqual(config.getfloat('KALMAN', 'qangle'), 0.01)
+        self.assertEqual(config.getfloat('MR', 'pgain'), 2.14699475516)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_StoreParameters_MissingSection(self):
+        original = STORAGE.replace('[KALMAN]\nqangle = 0.001\nqbias = 0.003\nrmeasure = 0.03\n\n', '')
+        with open(self.path, 'w') as f:
+            f.write(original)
+        storeParameters(self.path, 'KALMAN', 0.01, 0.002, 0.5)
+        with open(self.path) as f:
+            stored = f.read()
+        self.assertEqual(stored, original + '[KALMAN]\nqangle = 0.01\nqbias = 0.002\nrmeasure = 0.5\n\n')
+
+    def test_StoreParameters_MissingKey(self):
+        with open(self.path, 'w') as f:
+            f.write(STORAGE.replace('qbias = 0.003\n', ''))
+        storeParameters(self.path, 'KALMAN', 0.01, 0.002, 0.5)
+        with open(self.path) as f:
+            stored = f.read()
+        self.assertIn('[KALMAN]\nqangle = 0.01\nrmeasure = 0.5\nqbias = 0.002\n\n[POS]\n', stored)
+        self.assertTrue(stored.startswith(STORAGE[:STORAGE.index('[KALMAN]')]))
+
+    def test_StoreParameters_NewFile(self):
+        storeParameters(self.path, 'KALMAN', 0.01, 0.002, 0.5)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '[KALMAN]\nqangle = 0.01\nqbias = 0.002\nrmeasure = 0.5\n\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
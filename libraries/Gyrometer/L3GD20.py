@@ -1,18 +1,31 @@
 #!/usr/bin/python
 
-from smbus import SMBus
 import bitOps
-import numpy
+import contextlib
+import struct
 import time
+# smbus and numpy are imported where they are needed, importing the driver has no side effects
+
+monotonic = getattr(time, 'monotonic', time.time)
 
 class L3GD20(object):
     
-    def __init__(self, busId, slaveAddr, ifLog, ifWriteBlock):
-        self.__i2c = SMBus(busId)
+    def __init__(self, busId, slaveAddr, ifLog, ifWriteBlock, bus=None, simulate=False):
+        if bus is None:
+            if simulate:
+                from libraries.Bus.SimulatedBus import SimulatedBus
+                bus = SimulatedBus()
+            else:
+                from smbus import SMBus
+                bus = SMBus(busId)
+        self.__i2c = bus
         self.__slave = slaveAddr
         self.__ifWriteBlock = ifWriteBlock
         self.__ifLog = ifLog
         self.__x0 = 0
+        self.__shadow = {}  # Write-through copy of the control registers
+        self.__snapshot = None  # Register image while inside Snapshot()
+        self.__pending = None   # Registers to write while inside Configure()
         
     def __del__(self):
         del(self.__i2c)
@@ -24,17 +37,45 @@ class L3GD20(object):
         new        = '0b' + bin(new)[2:].zfill(8)
         print('Change in register:' + register + ' mask:' + mask + ' from:' + current + ' to:' + new)
         
+    def __readRegister(self, register):
+        if self.__pending is not None and register in self.__pending:
+            return self.__pending[register]
+        if self.__snapshot is not None:
+            return self.__snapshot[register]
+        if register in self.__shadow:
+            return self.__shadow[register]
+        current = self.__i2c.read_byte_data(self.__slave, register)
+        self.__updateShadow(register, current)
+        return current
+
+    def __updateShadow(self, register, value):
+        # Self-clearing bits are cleared by the device, keeping them would write them again
+        if register in self.__SHADOW_REGISTERS:
+            self.__shadow[register] = value & ~self.__SELF_CLEARING.get(register, 0)
+
     def __writeToRegister(self, register, mask, value):
-        current = self.__i2c.read_byte_data(self.__slave, register)  # Get current value
-        new = bitOps.SetValueUnderMask(value, current, mask)
+        current = self.__readRegister(register)  # Get current value
+        new = bitOps.SetValueUnderByteMask(value, current, mask)
         if self.__ifLog:
             self.__log(register, mask, current, new)
-        if  not self.__ifWriteBlock:
+        if self.__pending is not None:
+            self.__pending[register] = new
+        elif  not self.__ifWriteBlock:
             self.__i2c.write_byte_data(self.__slave, register, new)
+            self.__updateShadow(register, new)
         
     def __readFromRegister(self, register, mask):
-        current = self.__i2c.read_byte_data(self.__slave, register)   # Get current value
-        return bitOps.GetValueUnderMask(current, mask)
+        current = self.__readRegister(register)   # Get current value
+        return bitOps.GetValueUnderByteMask(current, mask)
+
+    def __readBlockFromRegister(self, register, length):
+        # Setting the MSB of the sub-address enables register auto-increment
+        return self.__i2c.read_i2c_block_data(self.__slave, register | self.__AUTO_INCREMENT, length)
+
+    def __readRawAxes(self, register, count):
+        # Little endian signed 16 bit words starting at register, read in one transaction
+        data = self.__readBlockFromRegister(register, 2 * count)
+        return struct.unpack('<' + 'h' * count, bytearray(data))
 
     
     def __readFromRegisterWithDictionaryMatch(self, register, mask, dictionary):
@@ -77,6 +118,21 @@ class L3GD20(object):
     __REG_RW_INT1_THS_ZL        = 0x37      # Interrupt 1 threshold level Z LSB register
     __REG_RW_INT1_DURATION      = 0x38      # Interrupt 1 duration register
     
+    __AUTO_INCREMENT            = 0x80      # Sub-address auto-increment bit
+    
+    # Control registers kept in the shadow, as (first register, count) blocks
+    __SHADOW_BLOCKS             = ((__REG_RW_CTRL_REG1, 5), (__REG_RW_FIFO_CTRL_REG, 1), (__REG_RW_INT1_CFG_REG, 1), (__REG_RW_INT1_THS_XH, 7))
+    __SHADOW_REGISTERS          = frozenset(r for first, count in __SHADOW_BLOCKS for r in range(first, first + count))
+    # Order for batched writes, interrupt and fifo setup before CTRL_REG1 powers the device up
+    __WRITE_ORDER               = (__REG_RW_CTRL_REG2, __REG_RW_CTRL_REG3, __REG_RW_CTRL_REG4, __REG_RW_REFERENCE,
+                                   __REG_RW_INT1_THS_XH, __REG_RW_INT1_THS_XL, __REG_RW_INT1_THS_YH, __REG_RW_INT1_THS_YL,
+                                   __REG_RW_INT1_THS_ZH, __REG_RW_INT1_THS_ZL, __REG_RW_INT1_DURATION, __REG_RW_INT1_CFG_REG,
+                                   __REG_RW_CTRL_REG5, __REG_RW_FIFO_CTRL_REG, __REG_RW_CTRL_REG1)
+    # Snapshot of 0x0f-0x38, split where the fifo address roll over (OUT_Z_H to OUT_X_L) would break auto-increment
+    __SNAPSHOT_BLOCKS           = ((__REG_R_WHO_AM_I, 31), (__REG_RW_FIFO_CTRL_REG, 11))
+    __MAX_BLOCK_SAMPLES         = 5         # XYZ samples per SMBus block read (32 byte limit)
+    __FIFO_DEPTH                = 32        # XYZ samples stored in the fifo
+    
     __MASK_CTRL_REG1_Xen        = 0x01      # X enable
     __MASK_CTRL_REG1_Yen        = 0x02      # Y enable
     __MASK_CTRL_REG1_Zen        = 0x04      # Z enable
@@ -135,6 +191,9 @@ class L3GD20(object):
     __MASK_INT1_THS_L           = 0xff      # LSB
     __MASK_INT1_DURATION_WAIT   = 0x80      # Wait number of samples or not
     __MASK_INT1_DURATION_D      = 0x7f      # Duration of int1 to be recognized
+    
+    # Bits the device clears by itself, never kept in the shadow
+    __SELF_CLEARING             = { __REG_RW_CTRL_REG5 : __MASK_CTRL_REG5_BOOT }
      
     PowerModeEnum = [ 'Power-down', 'Sleep', 'Normal']
     __PowerModeDict = { PowerModeEnum[0] : 0, PowerModeEnum[1] : 1, PowerModeEnum[2] : 2 }
@@ -232,60 +291,138 @@ class L3GD20(object):
     def Init(self):
         """Call this method after configuratin and before doing measurements"""
         print("Initiating...")
-        if (self.Get_FullScale_Value() == self.FullScaleEnum[0]):
+        fullScale = self.Get_FullScale_Value()
+        if (fullScale == self.FullScaleEnum[0]):
             self.gain = 0.00875
-        elif (self.Get_FullScale_Value() == self.FullScaleEnum[1]):
+        elif (fullScale == self.FullScaleEnum[1]):
             self.gain = 0.0175
-        elif (self.Get_FullScale_Value() == self.FullScaleEnum[2]):
+        elif (fullScale == self.FullScaleEnum[2]):
             self.gain = 0.07
         print("Gain set to:{0}".format(self.gain))
 
 
-    def CalibrateX(self):
+    def CalibrateX(self, samples=20):
         """Returns (min, mean, max)"""
-        print("Calibrating axis X, please do not move sensor...")
-        buff = []
-        for t in range(20):
-            while self.Get_AxisDataAvailable_Value()[0] == 0:
-                time.sleep(0.0001)
-            buff.append(self.Get_RawOutX_Value())
-        self.meanX = numpy.mean(buff) 
-        self.maxX = max(buff)
-        self.minX = min(buff)
-        print("Done: (min={0};mean={1};max={2})".format(self.minX, self.meanX, self.maxX))
+        return self.Calibrate(samples, axes='X')[0]
         
-    def CalibrateY(self):
+    def CalibrateY(self, samples=20):
         """Returns (min, mean, max)"""
-        print("Calibrating axis Y, please do not move sensor...")
-        buff = []
-        for t in range(20):
-            while self.Get_AxisDataAvailable_Value()[1] == 0:
-                time.sleep(0.0001)
-            buff.append(self.Get_RawOutY_Value())
-        self.meanY = numpy.mean(buff) 
-        self.maxY = max(buff)
-        self.minY = min(buff)
-        print("Done: (min={0};mean={1};max={2})".format(self.minY, self.meanY, self.maxY))
+        return self.Calibrate(samples, axes='Y')[0]
         
-    def CalibrateZ(self):
+    def CalibrateZ(self, samples=20):
         """Returns (min, mean, max)"""
-        print("Calibrating axis Z, please do not move sensor...")
-        buff = []
-        for t in range(20):
-            while self.Get_AxisDataAvailable_Value()[2] == 0:
-                time.sleep(0.0001)
-            buff.append(self.Get_RawOutZ_Value())
-        self.meanZ = numpy.mean(buff) 
-        self.maxZ = max(buff)
-        self.minZ = min(buff)
-        print("Done: (min={0};mean={1};max={2})".format(self.minZ, self.meanZ, self.maxZ))
+        return self.Calibrate(samples, axes='Z')[0]
+
+    def Resync(self):
+        """Refresh the control register shadow from the device"""
+        self.__shadow = {}
+        for first, count in self.__SHADOW_BLOCKS:
+            data = self.__readBlockFromRegister(first, count)
+            for register, value in zip(range(first, first + count), data):
+                self.__updateShadow(register, value)
+
+    @contextlib.contextmanager
+    def Snapshot(self):
+        """Within the with block all getters decode from one image of registers 0x0f-0x38"""
+        if self.__snapshot is not None:
+            yield
+            return
+        snapshot = {}
+        for first, count in self.__SNAPSHOT_BLOCKS:
+            data = self.__readBlockFromRegister(first, count)
+            snapshot.update(zip(range(first, first + count), data))
+        for register in self.__SHADOW_REGISTERS:
+            self.__updateShadow(register, snapshot[register])
+        self.__snapshot = snapshot
+        try:
+            yield
+        finally:
+            self.__snapshot = None
+
+    @contextlib.contextmanager
+    def Configure(self):
+        """Collects all Set_* calls of the with block and writes each changed register once on exit"""
+        if self.__pending is not None:
+            yield
+            return
+        self.__pending = {}
+        try:
+            yield
+            pending = self.__pending
+        finally:
+            self.__pending = None
+        if self.__ifWriteBlock:
+            return
+        for register in self.__WRITE_ORDER:
+            if register not in pending or self.__shadow.get(register) == pending[register]:
+                continue
+            self.__i2c.write_byte_data(self.__slave, register, pending[register])
+            self.__updateShadow(register, pending[register])
+
+    def Calibrate(self, samples=20, threshold=3.0, axes='XYZ'):
+        """Calibrates all axes from one set of samples, returns [(min, mean, max), ...] per axis"""
+        print("Calibrating axis " + axes + ", please do not move sensor...")
+        values = self.CollectSamples(samples)
+        low, mean, high = self.CalibrationStatistics(values, threshold)
+        result = []
+        for i, axis in enumerate('XYZ'):
+            if axis not in axes:
+                continue
+            stats = (low[i] * self.gain, mean[i] * self.gain, high[i] * self.gain)
+            setattr(self, 'min' + axis, stats[0])
+            setattr(self, 'mean' + axis, stats[1])
+            setattr(self, 'max' + axis, stats[2])
+            print("Done {0}: (min={1};mean={2};max={3})".format(axis, *stats))
+            result.append(stats)
+        return result
+
+    def CollectSamples(self, samples, timeout=None):
+        """Returns a (samples, 3) int16 array of raw counts, drained from the fifo in stream mode,
+        raises IOError if they did not arrive within timeout seconds, by default 4 times the time they take"""
+        import numpy
+        buff = numpy.empty((samples, 3), dtype=numpy.int16)
+        fifo = self.Get_Fifo_Enabled() and (self.Get_FifoMode_Value() == 'Stream')
+        # from the DR bits alone, Get_DataRateAndBandwidth has no entry for the 95 Hz encodings 0x02 and 0x03
+        period = 1.0 / self.DataRateValues[self.__readFromRegister(self.__REG_RW_CTRL_REG1, self.__MASK_CTRL_REG1_DR)]
+        if timeout is None:
+            timeout = 4.0 * samples * period + 0.1
+        deadline = monotonic() + timeout
+        n = 0
+        while n < samples:
+            if monotonic() > deadline:
+                raise IOError('Gyro delivered {0} of {1} samples within {2}s'.format(n, samples, timeout))
+            if fifo:
+                batch = self.ReadFifoRaw()
+            elif self.Get_AxisDataAvailable_Value() != (0, 0, 0):  # disabled axes never report data
+                batch = [self.Get_RawOutCounts_Value()]
+            else:
+                batch = []
+            count = min(len(batch), samples - n)
+            if count == 0:
+                time.sleep(period / 2)  # no new data, wait half an output data period
+                continue
+            buff[n:n + count] = batch[:count]
+            n += count
+        return buff
+
+    @staticmethod
+    def CalibrationStatistics(values, threshold=3.0):
+        """Per column (min, mean, max) of values, ignoring samples further than
+        threshold scaled median absolute deviations from the median"""
+        import numpy
+        values = numpy.asarray(values, dtype=float)
+        median = numpy.median(values, axis=0)
+        deviation = numpy.abs(values - median)
+        # 1.4826 scales the MAD to a standard deviation, floor at one count of quantization noise
+        sigma = numpy.maximum(numpy.median(deviation, axis=0) * 1.4826, 1.0)
+        inliers = numpy.ma.masked_array(values, deviation > threshold * sigma)
+        return (inliers.min(axis=0).filled(0.0), inliers.mean(axis=0).filled(0.0), inliers.max(axis=0).filled(0.0))
 
-    def Calibrate(self):
-		self.CalibrateX()
-		self.CalibrateY()
-		self.CalibrateZ()
-            
     def ReturnConfiguration(self):
+        with self.Snapshot():
+            return self.__ReturnConfiguration()
+
+    def __ReturnConfiguration(self):
         return  [
             [ self.Get_DeviceId_Value.__doc__, self.Get_DeviceId_Value()],
             
@@ -574,59 +711,45 @@ class L3GD20(object):
     
     def Get_AxisOverrun_Value(self):
         """(X, Y, Z) axis overrun"""
-        zor = 0
-        yor = 0
-        xor = 0
-        if self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_ZYXOR) == 0x01:
-            zor = self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_ZOR)
-            yor = self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_YOR)
-            xor = self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_XOR)
-        return (xor, yor, zor)
+        status = self.__readRegister(self.__REG_R_STATUS_REG)
+        if not bitOps.CheckBits(status, self.__MASK_STATUS_REG_ZYXOR):
+            return (0, 0, 0)
+        return (bitOps.GetValueUnderByteMask(status, self.__MASK_STATUS_REG_XOR),
+                bitOps.GetValueUnderByteMask(status, self.__MASK_STATUS_REG_YOR),
+                bitOps.GetValueUnderByteMask(status, self.__MASK_STATUS_REG_ZOR))
     
     def Get_AxisDataAvailable_Value(self):
         """(X, Y, Z) data available"""
-        zda = 0
-        yda = 0
-        xda = 0
-        if self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_ZYXDA) == 0x01:
-            zda = self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_ZDA)
-            yda = self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_YDA)
-            xda = self.__readFromRegister(self.__REG_R_STATUS_REG, self.__MASK_STATUS_REG_XDA)
-        return (xda, yda, zda)
+        status = self.__readRegister(self.__REG_R_STATUS_REG)
+        if not bitOps.CheckBits(status, self.__MASK_STATUS_REG_ZYXDA):
+            return (0, 0, 0)
+        return (bitOps.GetValueUnderByteMask(status, self.__MASK_STATUS_REG_XDA),
+                bitOps.GetValueUnderByteMask(status, self.__MASK_STATUS_REG_YDA),
+                bitOps.GetValueUnderByteMask(status, self.__MASK_STATUS_REG_ZDA))
     
     def Get_RawOutX_Value(self):
         """Raw X angular speed data"""
-        l = self.__readFromRegister(self.__REG_R_OUT_X_L, 0xff)
-        h_u2 = self.__readFromRegister(self.__REG_R_OUT_X_H, 0xff)
-        h = bitOps.TwosComplementToByte(h_u2)
-        if (h < 0):
-            return (h*256 - l) * self.gain
-        elif (h >= 0):
-            return (h*256 + l) * self.gain
+        return self.__readRawAxes(self.__REG_R_OUT_X_L, 1)[0] * self.gain
     
     def Get_RawOutY_Value(self):
         """Raw Y angular speed data"""
-        l = self.__readFromRegister(self.__REG_R_OUT_Y_L, 0xff)
-        h_u2 = self.__readFromRegister(self.__REG_R_OUT_Y_H, 0xff)
-        h = bitOps.TwosComplementToByte(h_u2)
-        if (h < 0):
-            return (h*256 - l) * self.gain
-        elif (h >= 0):
-            return (h*256 + l) * self.gain
+        return self.__readRawAxes(self.__REG_R_OUT_Y_L, 1)[0] * self.gain
     
     def Get_RawOutZ_Value(self):
         """Raw Z angular speed data"""
-        l = self.__readFromRegister(self.__REG_R_OUT_Z_L, 0xff)
-        h_u2 = self.__readFromRegister(self.__REG_R_OUT_Z_H, 0xff)
-        h = bitOps.TwosComplementToByte(h_u2)
-        if (h < 0):
-            return (h*256 - l) * self.gain
-        elif (h >= 0):
-            return (h*256 + l) * self.gain
+        return self.__readRawAxes(self.__REG_R_OUT_Z_L, 1)[0] * self.gain
+
+    def Get_RawOutCounts_Value(self, axes='XYZ'):
+        """Raw (X, Y, Z) angular speed data in counts, read in a single transaction
+        spanning the given axes, axes outside the span are 0"""
+        first = min('XYZ'.index(axis) for axis in axes)
+        last = max('XYZ'.index(axis) for axis in axes)
+        counts = self.__readRawAxes(self.__REG_R_OUT_X_L + 2 * first, last - first + 1)
+        return (0,) * first + counts + (0,) * (2 - last)
 
     def Get_RawOut_Value(self):
         """Raw [X, Y, Z] values of angular speed"""
-        return [self.Get_RawOutX_Value(), self.Get_RawOutY_Value(), self.Get_RawOutZ_Value()]
+        return [v * self.gain for v in self.Get_RawOutCounts_Value()]
         
     def Get_CalOutX_Value(self):
         """Calibrated X angular speed data"""
@@ -653,8 +776,11 @@ class L3GD20(object):
             return z - self.meanZ
     
     def Get_CalOut_Value(self):
-		"""Calibrated [X, Y, Z] value of angular speed, calibrated"""
-		return [self.Get_CalOutX_Value(), self.Get_CalOutY_Value(), self.Get_CalOutZ_Value()]
+        """Calibrated [X, Y, Z] value of angular speed, calibrated"""
+        x, y, z = self.Get_RawOut_Value()
+        return [0 if self.minX <= x <= self.maxX else x - self.meanX,
+                0 if self.minY <= y <= self.maxY else y - self.meanY,
+                0 if self.minZ <= z <= self.maxZ else z - self.meanZ]
 		
         
     def Set_FifoThreshold_Value(self, value):
@@ -685,6 +811,34 @@ class L3GD20(object):
         """Fifo filling is greater or equal than watermark level"""
         return self.__readFromRegisterWithDictionaryMatch(self.__REG_R_FIFO_SRC_REG, self.__MASK_FIFO_SRC_REG_WTM, self.__EnabledDict)
 
+    def ReadFifoRaw(self):
+        """Drain the fifo, returns an (n, 3) int16 array of raw counts"""
+        import numpy
+        src = self.__readFromRegister(self.__REG_R_FIFO_SRC_REG, 0xff)
+        if bitOps.CheckBits(src, self.__MASK_FIFO_SRC_REG_EMPTY):
+            count = 0
+        elif bitOps.CheckBits(src, self.__MASK_FIFO_SRC_REG_OVRN):
+            count = self.__FIFO_DEPTH
+        else:
+            count = bitOps.GetValueUnderByteMask(src, self.__MASK_FIFO_SRC_REG_FSS)
+        data = bytearray()
+        while count > 0:
+            # with the fifo enabled the address rolls over from OUT_Z_H to OUT_X_L
+            n = min(count, self.__MAX_BLOCK_SAMPLES)
+            data.extend(self.__readBlockFromRegister(self.__REG_R_OUT_X_L, 6 * n))
+            count -= n
+        return numpy.frombuffer(bytes(data), dtype='<i2').reshape(-1, 3)
+
+    def ReadFifo(self):
+        """Drain the fifo, returns an (n, 3) array of calibrated angular speed
+        Requires Set_Fifo_Enabled(True) and Set_FifoMode_Value('Stream')"""
+        import numpy
+        values = self.ReadFifoRaw() * self.gain
+        low = numpy.array([self.minX, self.minY, self.minZ])
+        high = numpy.array([self.maxX, self.maxY, self.maxZ])
+        mean = numpy.array([self.meanX, self.meanY, self.meanZ])
+        return numpy.where((values >= low) & (values <= high), 0.0, values - mean)
+
     def Set_Int1Combination_Value(self, value):
         self.__writeToRegisterWithDictionaryCheck(self.__REG_RW_INT1_CFG_REG, self.__MASK_INT1_CFG_ANDOR, value, self.__AndOrDict, 'AndOrEnum') 
     def Get_Int1Combination_Value(self):
@@ -0,0 +1,257 @@
+#!/usr/bin/python
+
+import unittest
+import struct
+import L3GD20
+
+
+class FakeSMBus(object):
+    """Register map backed stand-in for smbus.SMBus"""
+
+    def __init__(self, busId=1):
+        self.registers = [0] * 0x40
+        self.transactions = 0
+        self.fifo = []
+
+    def read_byte_data(self, addr, register):
+        self.transactions += 1
+        return self.registers[register]
+
+    def write_byte_data(self, addr, register, value):
+        self.transactions += 1
+        self.registers[register] = value
+
+    def read_i2c_block_data(self, addr, register, length):
+        self.transactions += 1
+        start = register & 0x7f
+        if start == 0x28 and self.fifo:
+            data = []
+            while len(data) < length:
+                data.extend(bytearray(struct.pack('<hhh', *self.fifo.pop(0))))
+            return data
+        if register & 0x80:
+            return self.registers[start:start + length]
+        return [self.registers[start]] * length
+
+    def setWord(self, register, value):
+        value &= 0xffff
+        self.registers[register] = value & 0xff
+        self.registers[register + 1] = value >> 8
+
+
+class L3GD20_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = FakeSMBus()
+        self.gyro = L3GD20.L3GD20(busId=1, slaveAddr=0x6b, ifLog=False, ifWriteBlock=False, bus=self.bus)
+
+    def test_RawOutCounts_SingleTransaction(self):
+        self.bus.setWord(0x28, 1000)
+        self.bus.setWord(0x2a, -1000)
+        self.bus.setWord(0x2c, -32768)
+        self.assertEqual(self.gyro.Get_RawOutCounts_Value(), (1000, -1000, -32768))
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_RawOutCounts_Span(self):
+        self.bus.setWord(0x28, 1)
+        self.bus.setWord(0x2a, 2)
+        self.bus.setWord(0x2c, 3)
+        self.assertEqual(self.gyro.Get_RawOutCounts_Value('X'), (1, 0, 0))
+        self.assertEqual(self.gyro.Get_RawOutCounts_Value('Z'), (0, 0, 3))
+        self.assertEqual(self.gyro.Get_RawOutCounts_Value('YZ'), (0, 2, 3))
+        self.assertEqual(self.bus.transactions, 3)
+
+    def test_RawOutX_Negative(self):
+        self.bus.setWord(0x28, -1)
+        self.assertEqual(self.gyro.Get_RawOutX_Value(), -1)
+        self.bus.setWord(0x28, -255)
+        self.assertEqual(self.gyro.Get_RawOutX_Value(), -255)
+        self.bus.setWord(0x28, 300)
+        self.assertEqual(self.gyro.Get_RawOutX_Value(), 300)
+
+    def test_RawOut_Gain(self):
+        self.gyro.gain = 0.5
+        self.bus.setWord(0x28, 2)
+        self.bus.setWord(0x2a, -4)
+        self.bus.setWord(0x2c, 6)
+        self.assertEqual(self.gyro.Get_RawOut_Value(), [1.0, -2.0, 3.0])
+
+    def test_CalOut_Deadband(self):
+        self.gyro.minX, self.gyro.meanX, self.gyro.maxX = -2, 0, 2
+        self.gyro.minY, self.gyro.meanY, self.gyro.maxY = -2, 1, 2
+        self.gyro.minZ, self.gyro.meanZ, self.gyro.maxZ = -2, 0, 2
+        self.bus.setWord(0x28, 1)
+        self.bus.setWord(0x2a, 10)
+        self.bus.setWord(0x2c, -10)
+        self.assertEqual(self.gyro.Get_CalOut_Value(), [0, 9, -10])
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_ReadFifoRaw_Empty(self):
+        self.bus.registers[0x2f] = 0x20
+        self.assertEqual(self.gyro.ReadFifoRaw().shape, (0, 3))
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_ReadFifoRaw_Level(self):
+        self.bus.fifo = [(i, -i, 2 * i) for i in range(12)]
+        self.bus.registers[0x2f] = 12
+        samples = self.gyro.ReadFifoRaw()
+        self.assertEqual(samples.shape, (12, 3))
+        self.assertEqual(samples[11].tolist(), [11, -11, 22])
+        self.assertEqual(self.bus.transactions, 4)
+
+    def test_ReadFifoRaw_Overrun(self):
+        self.bus.fifo = [(i, 0, 0) for i in range(32)]
+        self.bus.registers[0x2f] = 0x40 | 0x1f
+        self.assertEqual(self.gyro.ReadFifoRaw().shape, (32, 3))
+
+    def test_ReadFifo_Calibrated(self):
+        self.gyro.gain = 0.5
+        self.gyro.minX, self.gyro.meanX, self.gyro.maxX = -1, 0, 1
+        self.gyro.minY, self.gyro.meanY, self.gyro.maxY = 0, 1, 2
+        self.bus.fifo = [(2, 8, -8), (4, 2, 0)]
+        self.bus.registers[0x2f] = 2
+        self.assertEqual(self.gyro.ReadFifo().tolist(), [[0.0, 3.0, -4.0], [2.0, 0.0, 0.0]])
+
+    def test_Shadow_ReadModifyWrite(self):
+        self.gyro.Set_PowerMode("Normal")
+        self.gyro.Set_AxisX_Enabled(True)
+        self.gyro.Set_AxisY_Enabled(False)
+        self.gyro.Set_AxisZ_Enabled(False)
+        self.assertEqual(self.bus.registers[0x20], 0x09)
+        self.assertEqual(self.bus.transactions, 5)  # one read, four writes
+        self.assertEqual(self.gyro.Get_AxisX_Enabled(), True)
+        self.assertEqual(self.bus.transactions, 5)
+
+    def test_Shadow_BootNotRewritten(self):
+        self.gyro.Set_BootMode_Value('Reboot memory content')
+        self.assertEqual(self.bus.registers[0x24], 0x80)
+        self.bus.registers[0x24] = 0x00  # cleared by the device once the reboot is done
+        self.gyro.Set_Fifo_Enabled(True)
+        self.assertEqual(self.bus.registers[0x24], 0x40)
+        self.assertEqual(self.gyro.Get_BootMode_Value(), 'Normal')
+
+    def test_Snapshot_BootNotShadowed(self):
+        self.bus.registers[0x24] = 0x80  # reboot still in progress when the snapshot is taken
+        with self.gyro.Snapshot():
+            self.assertEqual(self.gyro.Get_BootMode_Value(), 'Reboot memory content')
+        self.bus.registers[0x24] = 0x00
+        self.gyro.Set_Fifo_Enabled(True)
+        self.assertEqual(self.bus.registers[0x24], 0x40)
+
+    def test_Shadow_Init(self):
+        self.bus.registers[0x23] = 0x10
+        self.gyro.Init()
+        self.assertEqual(self.gyro.gain, 0.0175)
+        self.assertEqual(self.bus.transactions, 1)
+
+    def test_Resync(self):
+        self.assertEqual(self.gyro.Get_FullScale_Value(), '250dps')
+        self.bus.registers[0x23] = 0x20
+        self.assertEqual(self.gyro.Get_FullScale_Value(), '250dps')
+        self.gyro.Resync()
+        self.assertEqual(self.gyro.Get_FullScale_Value(), '2000dps')
+        self.assertEqual(self.bus.transactions, 5)
+
+    def test_ReturnConfiguration_Snapshot(self):
+        self.bus.registers[0x0f] = 0xd4
+        self.bus.registers[0x27] = 0x0f
+        configuration = dict((doc, value) for doc, value in self.gyro.ReturnConfiguration())
+        self.assertEqual(configuration['Device Id.'], 0xd4)
+        self.assertEqual(configuration['(X, Y, Z) data available'], (1, 1, 1))
+        self.assertEqual(self.bus.transactions, 2)
+        self.gyro.Get_FullScale_Value()
+        self.assertEqual(self.bus.transactions, 2)  # snapshot refreshed the shadow
+        self.gyro.Get_DeviceId_Value()
+        self.assertEqual(self.bus.transactions, 3)  # outside the snapshot
+
+    def test_Status_SingleRead(self):
+        self.bus.registers[0x27] = 0xa9
+        self.assertEqual(self.gyro.Get_AxisOverrun_Value(), (0, 1, 0))
+        self.assertEqual(self.gyro.Get_AxisDataAvailable_Value(), (1, 0, 0))
+        self.bus.registers[0x27] = 0x07
+        self.assertEqual(self.gyro.Get_AxisDataAvailable_Value(), (0, 0, 0))
+        self.assertEqual(self.bus.transactions, 3)
+
+    def test_Configure_Batched(self):
+        writes = []
+        write_byte_data = self.bus.write_byte_data
+        self.bus.write_byte_data = lambda addr, register, value: (writes.append(register), write_byte_data(addr, register, value))
+        with self.gyro.Configure():
+            self.gyro.Set_PowerMode("Normal")
+            self.gyro.Set_AxisX_Enabled(True)
+            self.gyro.Set_AxisY_Enabled(False)
+            self.gyro.Set_FullScale_Value("500dps")
+            self.gyro.Set_Fifo_Enabled(True)
+            self.assertEqual(self.gyro.Get_FullScale_Value(), "500dps")
+            self.assertEqual(writes, [])
+        self.assertEqual(writes, [0x23, 0x24, 0x20])
+        self.assertEqual(self.bus.registers[0x20], 0x09)
+        self.assertEqual(self.bus.registers[0x23], 0x10)
+        self.assertEqual(self.bus.registers[0x24], 0x40)
+
+    def test_Configure_SkipsUnchanged(self):
+        self.gyro.Set_AxisX_Enabled(True)
+        transactions = self.bus.transactions
+        with self.gyro.Configure():
+            self.gyro.Set_AxisX_Enabled(True)
+        self.assertEqual(self.bus.transactions, transactions)
+
+    def test_Configure_Exception(self):
+        try:
+            with self.gyro.Configure():
+                self.gyro.Set_AxisX_Enabled(True)
+                self.gyro.Set_FullScale_Value("1dps")
+        except Exception:
+            pass
+        self.assertEqual(self.bus.registers[0x20], 0x00)
+        self.assertEqual(self.gyro.Get_AxisX_Enabled(), False)
+
+    def test_CalibrationStatistics(self):
+        values = [[10, -5, 0]] * 18 + [[11, -4, 1], [500, -5, 0]]
+        low, mean, high = L3GD20.L3GD20.CalibrationStatistics(values)
+        self.assertEqual(low.tolist(), [10, -5, 0])
+        self.assertEqual(high.tolist(), [11, -4, 1])
+        self.assertAlmostEqual(mean[0], 10 + 1.0 / 19)
+
+    def test_Calibrate_AllAxes(self):
+        self.bus.registers[0x27] = 0x0f
+        self.bus.setWord(0x28, 100)
+        self.bus.setWord(0x2a, -100)
+        self.bus.setWord(0x2c, 4)
+        self.gyro.gain = 0.5
+        result = self.gyro.Calibrate(samples=10)
+        self.assertEqual(result, [(50, 50, 50), (-50, -50, -50), (2, 2, 2)])
+        self.assertEqual((self.gyro.minY, self.gyro.meanY, self.gyro.maxY), (-50, -50, -50))
+
+    def test_CalibrateX_OnlyX(self):
+        self.bus.registers[0x27] = 0x0f
+        self.bus.setWord(0x28, 100)
+        self.bus.setWord(0x2a, -100)
+        self.assertEqual(self.gyro.CalibrateX(samples=5), (100, 100, 100))
+        self.assertEqual(self.gyro.meanY, 0)
+
+    def test_CollectSamples_OnlyXEnabled(self):
+        self.bus.registers[0x27] = 0x09  # disabled axes never report data
+        self.bus.setWord(0x28, 7)
+        self.assertEqual(self.gyro.CollectSamples(3)[:, 0].tolist(), [7, 7, 7])
+
+    def test_CollectSamples_95HzEncoding(self):
+        self.bus.registers[0x20] = 0x2f  # 95 Hz with the second 25 Hz bandwidth encoding
+        self.bus.registers[0x27] = 0x0f
+        self.bus.setWord(0x28, 5)
+        self.assertEqual(self.gyro.CollectSamples(2)[:, 0].tolist(), [5, 5])
+
+    def test_CollectSamples_Timeout(self):
+        self.bus.registers[0x27] = 0x00  # sensor stopped producing data
+        self.assertRaises(IOError, self.gyro.CollectSamples, 2, timeout=0.05)
+
+    def test_CollectSamples_Fifo(self):
+        self.gyro.Set_Fifo_Enabled(True)
+        self.gyro.Set_FifoMode_Value('Stream')
+        self.bus.fifo = [(i, 0, 0) for i in range(8)]
+        self.bus.registers[0x2f] = 8
+        self.assertEqual(self.gyro.CollectSamples(6)[:, 0].tolist(), list(range(6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
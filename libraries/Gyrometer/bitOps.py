@@ -43,6 +43,15 @@ def GetValueUnderMask(currentValue, mask):
         i += 1
     return currentValueCleared >> i
 
+# Position of the lowest set bit for every 8 bit mask, replaces the shift loop above
+ByteMaskShift = [0] + [(mask & -mask).bit_length() - 1 for mask in range(1, 256)]
+
+def SetValueUnderByteMask(valueToSetUnderMask, currentValue, mask):
+    return (currentValue & ~mask) | ((valueToSetUnderMask << ByteMaskShift[mask]) & mask)
+
+def GetValueUnderByteMask(currentValue, mask):
+    return (currentValue & mask) >> ByteMaskShift[mask]
+
 def TwosComplementToByte(value):
     if value >= 0 and value <= 127:
         return value
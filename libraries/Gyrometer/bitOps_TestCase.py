@@ -62,6 +62,19 @@ class bitOps_TestCase(unittest.TestCase):
         self.assertEqual(bitOps.GetValueUnderMask(0xa5, 0xf0), 0x0a)
         self.assertEqual(bitOps.GetValueUnderMask(0x95, 0x30), 0x01)
 
+    def test_SetValueUnderByteMask(self):
+        self.assertEqual(bitOps.SetValueUnderByteMask(0x01, 0x00, 0xf0), 0x10)
+        self.assertEqual(bitOps.SetValueUnderByteMask(0x0e, 0xff, 0xf0), 0xef)
+        self.assertEqual(bitOps.SetValueUnderByteMask(0x00, 0xff, 0xf0), 0x0f)
+        self.assertEqual(bitOps.SetValueUnderByteMask(0x00, 0xff, 0x01), 0xfe)
+        self.assertEqual(bitOps.SetValueUnderByteMask(0x07, 0x00, 0x30), 0x30)
+
+    def test_GetValueUnderByteMask(self):
+        self.assertEqual(bitOps.GetValueUnderByteMask(0xa5, 0xf0), 0x0a)
+        self.assertEqual(bitOps.GetValueUnderByteMask(0x95, 0x30), 0x01)
+        for mask in range(256):
+            self.assertEqual(bitOps.GetValueUnderByteMask(0xa5, mask), bitOps.GetValueUnderMask(0xa5, mask))
+
         
         
 if __name__ == '__main__':